@@ -4,16 +4,98 @@ Import Baseball Databank (Lahman) data as validation tables.
 This data covers 1871-2025 and can be used to validate our metrics.
 """
 
+import csv
 import duckdb
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Use script directory for portability
 BASE_DIR = Path(__file__).parent.resolve()
 DB_PATH = BASE_DIR / "baseball.duckdb"
 LAHMAN_DIR = BASE_DIR / "lahman_1871-2025_csv"
+MEMORY_LIMIT = "4GB"
+LAHMAN_FILES = ["People", "Batting", "Pitching", "Fielding", "Teams"]
+
+# Types for Lahman CSV columns; anything not listed is read as VARCHAR.
+# Keys are lower-cased since the CSVs are inconsistent (IPouts vs IPOuts).
+LAHMAN_COLUMN_TYPES = {
+    **{col.lower(): 'INTEGER' for col in [
+        'yearID', 'stint', 'G', 'GS', 'Ghome', 'Rank', 'W', 'L',
+        'AB', 'R', 'H', '2B', '3B', 'HR', 'RBI', 'SB', 'CS', 'BB', 'SO',
+        'IBB', 'HBP', 'SH', 'SF', 'GIDP',
+        'CG', 'SHO', 'SV', 'IPouts', 'ER', 'BFP', 'GF', 'WP', 'BK',
+        'InnOuts', 'PO', 'A', 'E', 'DP', 'PB',
+        'RA', 'HA', 'HRA', 'BBA', 'SOA', 'attendance', 'BPF', 'PPF',
+        'birthYear', 'birthMonth', 'birthDay', 'deathYear', 'deathMonth', 'deathDay',
+        'weight', 'height',
+    ]},
+    **{col.lower(): 'DOUBLE' for col in ['ERA', 'BAOpp', 'FP', 'ZR']},
+    **{col.lower(): 'DATE' for col in ['debut', 'finalGame']},
+}
+
+# The Parquet caches are keyed on the types map as well as the CSV's mtime,
+# so editing LAHMAN_COLUMN_TYPES re-converts the CSVs on the next run
+TYPES_SIGNATURE = hashlib.sha256(repr(sorted(LAHMAN_COLUMN_TYPES.items())).encode()).hexdigest()[:16]
+
+
+def lahman_csv(name):
+    """Return a read_csv() call for a Lahman CSV with an explicit schema.
+
+    The column list comes from the file's header line, so DuckDB can skip the
+    sniffer and use its parallel CSV reader.
+    """
+    path = LAHMAN_DIR / f"{name}.csv"
+    with open(path, newline='') as f:
+        header = next(csv.reader(f))
+    columns = ", ".join(
+        f"'{col}': '{LAHMAN_COLUMN_TYPES.get(col.lower(), 'VARCHAR')}'" for col in header
+    )
+    return f"read_csv('{path}', header = true, auto_detect = false, columns = {{{columns}}})"
+
+
+def lahman_parquet_path(name):
+    """Return the path of a Lahman table's Parquet cache for the current types map."""
+    return LAHMAN_DIR / f"{name}_{TYPES_SIGNATURE}.parquet"
+
+
+def cache_lahman_parquet(name):
+    """Write a zstd Parquet copy of a Lahman CSV if it is missing or older than the CSV.
+
+    Uses its own cursor so several files can be converted concurrently.
+    """
+    csv_path = LAHMAN_DIR / f"{name}.csv"
+    parquet_path = lahman_parquet_path(name)
+    if parquet_path.exists() and parquet_path.stat().st_mtime >= csv_path.stat().st_mtime:
+        return
+    print(f"   Caching {csv_path.name} as {parquet_path.name}...")
+    cursor = con.cursor()
+    cursor.execute(f"""
+        COPY (SELECT * FROM {lahman_csv(name)})
+        TO '{parquet_path}' (FORMAT PARQUET, COMPRESSION 'zstd')
+    """)
+    cursor.close()
+
+    # Copies made with a different types map (or before the cache was keyed
+    # on it) are removed once the new one exists
+    for stale_path in [LAHMAN_DIR / f"{name}.parquet", *LAHMAN_DIR.glob(f"{name}_*.parquet")]:
+        if stale_path != parquet_path:
+            stale_path.unlink(missing_ok=True)
+
+
+def lahman_source(name):
+    """Return a read_parquet() call for a Lahman table's cached Parquet copy."""
+    return f"read_parquet('{lahman_parquet_path(name)}')"
+
 
 con = duckdb.connect(str(DB_PATH), read_only=False)
 
+# Bulk-load settings: no ordered materialization, bounded memory for the CSV
+# reader, and no automatic checkpoints until the whole load has committed
+con.execute("SET preserve_insertion_order = false")
+con.execute(f"SET memory_limit = '{MEMORY_LIMIT}'")
+con.execute("SET checkpoint_threshold = '16GB'")
+
 # Create validation schema
 con.execute("CREATE SCHEMA IF NOT EXISTS validation")
 
@@ -21,15 +103,15 @@ print("="*70)
 print("Importing Lahman Baseball Database (1871-2025)")
 print("="*70)
 
+# Refresh the Parquet caches concurrently so re-runs skip CSV parsing entirely
+with ThreadPoolExecutor(max_workers=len(LAHMAN_FILES)) as pool:
+    list(pool.map(cache_lahman_parquet, LAHMAN_FILES))
+
 # ============================================================
 # 1. Import People
 # ============================================================
-print("\n1. Creating validation.lahman_people...")
-
-con.execute("DROP TABLE IF EXISTS validation.lahman_people")
-
-con.execute(f"""
-    CREATE TABLE validation.lahman_people AS
+people_sql = f"""
+    CREATE OR REPLACE TABLE validation.lahman_people AS
     SELECT
         playerID AS player_id,
         nameFirst AS first_name,
@@ -56,24 +138,27 @@ con.execute(f"""
         retroID AS retro_id,
         bbrefID AS bbref_id,
         'lahman' AS data_source
-    FROM read_csv_auto('{LAHMAN_DIR}/People.csv')
-""")
+    FROM {lahman_source('People')}
+"""
+
+# Narrow playerID -> retroID lookup shared by the batting/pitching/fielding loads,
+# so People.csv is only parsed once
+people_retro_sql = """
+    CREATE OR REPLACE TEMP TABLE people_retro AS
+    SELECT player_id, retro_id FROM validation.lahman_people
+"""
 
-count = con.execute("SELECT COUNT(*) FROM validation.lahman_people").fetchone()[0]
-print(f"   Imported: {count:,} player records")
+# The season-level tables are stored sorted by season so season-filtered
+# queries can skip row groups via min/max statistics
 
 # ============================================================
 # 2. Import Batting (1871-2025)
 # ============================================================
-print("\n2. Creating validation.lahman_batting...")
-
-con.execute("DROP TABLE IF EXISTS validation.lahman_batting")
-
-con.execute(f"""
-    CREATE TABLE validation.lahman_batting AS
+batting_sql = f"""
+    CREATE OR REPLACE TABLE validation.lahman_batting AS
     SELECT
         b.playerID AS player_id,
-        p.retroID AS retro_id,
+        p.retro_id,
         b.yearID AS season,
         b.stint,
         b.teamID AS team_id,
@@ -97,26 +182,19 @@ con.execute(f"""
         b.SF AS sacrifice_flies,
         b.GIDP AS grounded_into_double_play,
         'lahman' AS data_source
-    FROM read_csv_auto('{LAHMAN_DIR}/Batting.csv') b
-    LEFT JOIN read_csv_auto('{LAHMAN_DIR}/People.csv') p ON b.playerID = p.playerID
-""")
-
-count = con.execute("SELECT COUNT(*) FROM validation.lahman_batting").fetchone()[0]
-year_range = con.execute("SELECT MIN(season), MAX(season) FROM validation.lahman_batting").fetchone()
-print(f"   Imported: {count:,} batting records ({year_range[0]}-{year_range[1]})")
+    FROM {lahman_source('Batting')} b
+    LEFT JOIN people_retro p ON b.playerID = p.player_id
+    ORDER BY season, player_id
+"""
 
 # ============================================================
 # 3. Import Pitching (1871-2025)
 # ============================================================
-print("\n3. Creating validation.lahman_pitching...")
-
-con.execute("DROP TABLE IF EXISTS validation.lahman_pitching")
-
-con.execute(f"""
-    CREATE TABLE validation.lahman_pitching AS
+pitching_sql = f"""
+    CREATE OR REPLACE TABLE validation.lahman_pitching AS
     SELECT
         p.playerID AS player_id,
-        ppl.retroID AS retro_id,
+        ppl.retro_id,
         p.yearID AS season,
         p.stint,
         p.teamID AS team_id,
@@ -147,26 +225,19 @@ con.execute(f"""
         p.WP AS wild_pitches,
         p.BK AS balks,
         'lahman' AS data_source
-    FROM read_csv_auto('{LAHMAN_DIR}/Pitching.csv') p
-    LEFT JOIN read_csv_auto('{LAHMAN_DIR}/People.csv') ppl ON p.playerID = ppl.playerID
-""")
-
-count = con.execute("SELECT COUNT(*) FROM validation.lahman_pitching").fetchone()[0]
-year_range = con.execute("SELECT MIN(season), MAX(season) FROM validation.lahman_pitching").fetchone()
-print(f"   Imported: {count:,} pitching records ({year_range[0]}-{year_range[1]})")
+    FROM {lahman_source('Pitching')} p
+    LEFT JOIN people_retro ppl ON p.playerID = ppl.player_id
+    ORDER BY season, player_id
+"""
 
 # ============================================================
 # 4. Import Fielding (1871-2025)
 # ============================================================
-print("\n4. Creating validation.lahman_fielding...")
-
-con.execute("DROP TABLE IF EXISTS validation.lahman_fielding")
-
-con.execute(f"""
-    CREATE TABLE validation.lahman_fielding AS
+fielding_sql = f"""
+    CREATE OR REPLACE TABLE validation.lahman_fielding AS
     SELECT
         f.playerID AS player_id,
-        p.retroID AS retro_id,
+        p.retro_id,
         f.yearID AS season,
         f.stint,
         f.teamID AS team_id,
@@ -185,23 +256,16 @@ con.execute(f"""
         f.CS AS caught_stealing,
         f.ZR AS zone_rating,
         'lahman' AS data_source
-    FROM read_csv_auto('{LAHMAN_DIR}/Fielding.csv') f
-    LEFT JOIN read_csv_auto('{LAHMAN_DIR}/People.csv') p ON f.playerID = p.playerID
-""")
-
-count = con.execute("SELECT COUNT(*) FROM validation.lahman_fielding").fetchone()[0]
-year_range = con.execute("SELECT MIN(season), MAX(season) FROM validation.lahman_fielding").fetchone()
-print(f"   Imported: {count:,} fielding records ({year_range[0]}-{year_range[1]})")
+    FROM {lahman_source('Fielding')} f
+    LEFT JOIN people_retro p ON f.playerID = p.player_id
+    ORDER BY season, player_id
+"""
 
 # ============================================================
 # 5. Import Teams
 # ============================================================
-print("\n5. Creating validation.lahman_teams...")
-
-con.execute("DROP TABLE IF EXISTS validation.lahman_teams")
-
-con.execute(f"""
-    CREATE TABLE validation.lahman_teams AS
+teams_sql = f"""
+    CREATE OR REPLACE TABLE validation.lahman_teams AS
     SELECT
         yearID AS season,
         lgID AS league_id,
@@ -250,58 +314,76 @@ con.execute(f"""
         DP AS double_plays,
         FP AS fielding_percentage,
         'lahman' AS data_source
-    FROM read_csv_auto('{LAHMAN_DIR}/Teams.csv')
-""")
-
-count = con.execute("SELECT COUNT(*) FROM validation.lahman_teams").fetchone()[0]
-year_range = con.execute("SELECT MIN(season), MAX(season) FROM validation.lahman_teams").fetchone()
-print(f"   Imported: {count:,} team records ({year_range[0]}-{year_range[1]})")
+    FROM {lahman_source('Teams')}
+    ORDER BY season, team_id
+"""
 
 # ============================================================
-# 6. Create aggregate views for easier validation
+# 6. Create aggregate tables for easier validation
 # ============================================================
-print("\n6. Creating validation summary views...")
-
-con.execute("DROP VIEW IF EXISTS validation.lahman_batting_season_agg")
-
-con.execute("""
-    CREATE VIEW validation.lahman_batting_season_agg AS
+# Materialized (not views) and sorted by season so per-season lookups can
+# skip row groups via min/max statistics
+batting_agg_sql = """
+    CREATE OR REPLACE TABLE validation.lahman_batting_season_agg AS
+    WITH sums AS (
+        SELECT
+            player_id,
+            retro_id,
+            season,
+            SUM(at_bats) AS at_bats,
+            SUM(hits) AS hits,
+            SUM(doubles) AS doubles,
+            SUM(triples) AS triples,
+            SUM(home_runs) AS home_runs,
+            SUM(runs) AS runs,
+            SUM(runs_batted_in) AS runs_batted_in,
+            SUM(walks) AS walks,
+            SUM(intentional_walks) AS intentional_walks,
+            SUM(hit_by_pitch) AS hit_by_pitch,
+            SUM(sacrifice_bunts) AS sacrifice_bunts,
+            SUM(sacrifice_flies) AS sacrifice_flies,
+            SUM(strikeouts) AS strikeouts
+        FROM validation.lahman_batting
+        GROUP BY player_id, retro_id, season
+    ),
+    calculated AS (
+        SELECT *,
+            hits - doubles - triples - home_runs AS singles,
+            doubles + 2*triples + 3*home_runs AS total_bases,
+            CAST(hits + walks + hit_by_pitch AS DOUBLE) /
+                NULLIF(at_bats + walks + hit_by_pitch + sacrifice_flies, 0) AS obp,
+            CAST(doubles + 2*triples + 3*home_runs AS DOUBLE) / NULLIF(at_bats, 0) AS slg
+        FROM sums
+    )
     SELECT
         player_id,
         retro_id,
         season,
-        SUM(at_bats) AS at_bats,
-        SUM(hits) AS hits,
-        SUM(doubles) AS doubles,
-        SUM(triples) AS triples,
-        SUM(home_runs) AS home_runs,
-        SUM(runs) AS runs,
-        SUM(runs_batted_in) AS runs_batted_in,
-        SUM(walks) AS walks,
-        SUM(intentional_walks) AS intentional_walks,
-        SUM(hit_by_pitch) AS hit_by_pitch,
-        SUM(sacrifice_bunts) AS sacrifice_bunts,
-        SUM(sacrifice_flies) AS sacrifice_flies,
-        SUM(strikeouts) AS strikeouts,
-        SUM(hits) - SUM(doubles) - SUM(triples) - SUM(home_runs) AS singles,
-        SUM(doubles) + 2*SUM(triples) + 3*SUM(home_runs) AS total_bases,
-        ROUND(CAST(SUM(hits) AS DOUBLE) / NULLIF(SUM(at_bats), 0), 3) AS batting_average,
-        ROUND(CAST(SUM(hits) + SUM(walks) + SUM(hit_by_pitch) AS DOUBLE) /
-              NULLIF(SUM(at_bats) + SUM(walks) + SUM(hit_by_pitch) + SUM(sacrifice_flies), 0), 3) AS on_base_percentage,
-        ROUND(CAST(SUM(doubles) + 2*SUM(triples) + 3*SUM(home_runs) AS DOUBLE) /
-              NULLIF(SUM(at_bats), 0), 3) AS slugging_percentage,
-        ROUND((CAST(SUM(hits) + SUM(walks) + SUM(hit_by_pitch) AS DOUBLE) /
-              NULLIF(SUM(at_bats) + SUM(walks) + SUM(hit_by_pitch) + SUM(sacrifice_flies), 0)) +
-              (CAST(SUM(doubles) + 2*SUM(triples) + 3*SUM(home_runs) AS DOUBLE) /
-              NULLIF(SUM(at_bats), 0)), 3) AS ops
-    FROM validation.lahman_batting
-    GROUP BY player_id, retro_id, season
-""")
-
-con.execute("DROP VIEW IF EXISTS validation.lahman_pitching_season_agg")
+        at_bats,
+        hits,
+        doubles,
+        triples,
+        home_runs,
+        runs,
+        runs_batted_in,
+        walks,
+        intentional_walks,
+        hit_by_pitch,
+        sacrifice_bunts,
+        sacrifice_flies,
+        strikeouts,
+        singles,
+        total_bases,
+        ROUND(CAST(hits AS DOUBLE) / NULLIF(at_bats, 0), 3) AS batting_average,
+        ROUND(obp, 3) AS on_base_percentage,
+        ROUND(slg, 3) AS slugging_percentage,
+        ROUND(obp + slg, 3) AS ops
+    FROM calculated
+    ORDER BY season
+"""
 
-con.execute("""
-    CREATE VIEW validation.lahman_pitching_season_agg AS
+pitching_agg_sql = """
+    CREATE OR REPLACE TABLE validation.lahman_pitching_season_agg AS
     SELECT
         player_id,
         retro_id,
@@ -320,10 +402,70 @@ con.execute("""
               NULLIF(SUM(outs_recorded) / 3, 0), 2) AS era
     FROM validation.lahman_pitching
     GROUP BY player_id, retro_id, season
-""")
+    ORDER BY season
+"""
 
-print("   Created: lahman_batting_season_agg view")
-print("   Created: lahman_pitching_season_agg view")
+# ============================================================
+# Run the whole load as one transaction and one multi-statement batch
+# ============================================================
+print("\nLoading Lahman tables...")
+
+con.execute("BEGIN TRANSACTION")
+
+# Older builds created the season aggregates as views
+for agg_name in ("lahman_batting_season_agg", "lahman_pitching_season_agg"):
+    is_view = con.execute("""
+        SELECT COUNT(*) FROM duckdb_views()
+        WHERE schema_name = 'validation' AND view_name = ?
+    """, [agg_name]).fetchone()[0] > 0
+    if is_view:
+        con.execute(f"DROP VIEW validation.{agg_name}")
+
+con.execute(";\n".join([
+    people_sql,
+    people_retro_sql,
+    batting_sql,
+    pitching_sql,
+    fielding_sql,
+    teams_sql,
+    batting_agg_sql,
+    pitching_agg_sql,
+]))
+
+con.execute("COMMIT")
+
+loaded = {
+    table: (count, min_season, max_season)
+    for table, count, min_season, max_season in con.execute("""
+        SELECT 'lahman_people', COUNT(*), NULL, NULL FROM validation.lahman_people
+        UNION ALL
+        SELECT 'lahman_batting', COUNT(*), MIN(season), MAX(season) FROM validation.lahman_batting
+        UNION ALL
+        SELECT 'lahman_pitching', COUNT(*), MIN(season), MAX(season) FROM validation.lahman_pitching
+        UNION ALL
+        SELECT 'lahman_fielding', COUNT(*), MIN(season), MAX(season) FROM validation.lahman_fielding
+        UNION ALL
+        SELECT 'lahman_teams', COUNT(*), MIN(season), MAX(season) FROM validation.lahman_teams
+    """).fetchall()
+}
+
+for i, (table, description) in enumerate([
+    ("lahman_people", "player"),
+    ("lahman_batting", "batting"),
+    ("lahman_pitching", "pitching"),
+    ("lahman_fielding", "fielding"),
+    ("lahman_teams", "team"),
+], start=1):
+    count, min_season, max_season = loaded[table]
+    print(f"\n{i}. Created validation.{table}")
+    if min_season is None:
+        print(f"   Imported: {count:,} {description} records")
+    else:
+        print(f"   Imported: {count:,} {description} records ({min_season}-{max_season})")
+
+print("\n6. Created validation summary tables")
+print("   Created: lahman_batting_season_agg table")
+print("   Created: lahman_pitching_season_agg table")
 
 # ============================================================
 # 7. Run validation checks
@@ -334,47 +476,65 @@ print("="*70)
 
 validation_years = [1950, 1980, 2000, 2020, 2022, 2023, 2024]
 
-for year in validation_years:
-    print(f"\n{year} Season:")
-
-    # Batting comparison
-    our_batting = con.execute(f"""
-        SELECT
-            ROUND(SUM(hits)::DOUBLE / SUM(at_bats)::DOUBLE, 3) as ba
+# Compare all years in one query: each side is aggregated per season and the
+# results are joined on season, so Python only formats the output
+comparison = con.execute("""
+    WITH years AS (
+        SELECT UNNEST(?) AS season
+    ),
+    our_batting AS (
+        SELECT season, ROUND(SUM(hits)::DOUBLE / SUM(at_bats)::DOUBLE, 3) AS ba
         FROM metrics_player_season_league_offense
-        WHERE season = {year} AND at_bats > 0
-    """).fetchone()
-
-    lahman_batting = con.execute(f"""
-        SELECT
-            ROUND(SUM(hits)::DOUBLE / SUM(at_bats)::DOUBLE, 3) as ba
+        WHERE season IN (SELECT season FROM years) AND at_bats > 0
+        GROUP BY season
+    ),
+    lahman_batting AS (
+        SELECT season, ROUND(SUM(hits)::DOUBLE / SUM(at_bats)::DOUBLE, 3) AS ba
         FROM validation.lahman_batting_season_agg
-        WHERE season = {year} AND at_bats > 0
-    """).fetchone()
-
-    if lahman_batting[0]:
-        diff = (our_batting[0] - lahman_batting[0]) if our_batting[0] and lahman_batting[0] else 0
-        match = "✓" if abs(diff) < 0.001 else "✗"
-        print(f"  BA - Ours: {our_batting[0]}, Lahman: {lahman_batting[0]}, Diff: {diff:+.4f} {match}")
-
-    # Pitching comparison - use league average from Lahman teams table
-    our_pitching = con.execute(f"""
-        SELECT
-            ROUND(SUM(earned_runs) * 9 / SUM(outs_recorded / 3), 2) as era
+        WHERE season IN (SELECT season FROM years) AND at_bats > 0
+        GROUP BY season
+    ),
+    our_pitching AS (
+        SELECT season, ROUND(SUM(earned_runs) * 9 / SUM(outs_recorded / 3), 2) AS era
         FROM metrics_player_season_league_pitching
-        WHERE season = {year} AND outs_recorded > 0
-    """).fetchone()
-
-    lahman_pitching = con.execute(f"""
-        SELECT ROUND(AVG(era), 2)
+        WHERE season IN (SELECT season FROM years) AND outs_recorded > 0
+        GROUP BY season
+    ),
+    -- Pitching comparison - use league average from Lahman teams table
+    lahman_pitching AS (
+        SELECT season, ROUND(AVG(era), 2) AS era
         FROM validation.lahman_teams
-        WHERE season = {year} AND era IS NOT NULL
-    """).fetchone()
+        WHERE season IN (SELECT season FROM years) AND era IS NOT NULL
+        GROUP BY season
+    )
+    SELECT
+        y.season,
+        ob.ba AS our_ba,
+        lb.ba AS lahman_ba,
+        op.era AS our_era,
+        lp.era AS lahman_era
+    FROM years y
+    LEFT JOIN our_batting ob USING (season)
+    LEFT JOIN lahman_batting lb USING (season)
+    LEFT JOIN our_pitching op USING (season)
+    LEFT JOIN lahman_pitching lp USING (season)
+    ORDER BY y.season
+""", [validation_years]).fetchall()
+
+for year, our_ba, lahman_ba, our_era, lahman_era in comparison:
+    print(f"\n{year} Season:")
+
+    # Batting comparison
+    if lahman_ba:
+        diff = (our_ba - lahman_ba) if our_ba and lahman_ba else 0
+        match = "✓" if abs(diff) < 0.001 else "✗"
+        print(f"  BA - Ours: {our_ba}, Lahman: {lahman_ba}, Diff: {diff:+.4f} {match}")
 
-    if lahman_pitching and lahman_pitching[0]:
-        diff = (our_pitching[0] - lahman_pitching[0]) if our_pitching[0] and lahman_pitching[0] else 0
+    # Pitching comparison
+    if lahman_era:
+        diff = (our_era - lahman_era) if our_era and lahman_era else 0
         match = "✓" if abs(diff) < 0.10 else "✗"
-        print(f"  ERA - Ours: {our_pitching[0]}, Lahman: {lahman_pitching[0]}, Diff: {diff:+.2f} {match}")
+        print(f"  ERA - Ours: {our_era}, Lahman: {lahman_era}, Diff: {diff:+.2f} {match}")
 
 print("\n" + "="*70)
 print("Data Coverage")
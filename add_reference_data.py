@@ -5,23 +5,111 @@ Imports roster files from Retrosheet and downloads team/park reference data.
 """
 
 import duckdb
+import hashlib
+import io
+import os
+import urllib.error
+import urllib.request
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import csv
-import subprocess
-import tempfile
-import shutil
+import pyarrow as pa
+import pyarrow.csv as pacsv
 
 # Use script directory for portability
 BASE_DIR = Path(__file__).parent.resolve()
 DB_PATH = BASE_DIR / "baseball.duckdb"
 RETROSHEET_DIR = BASE_DIR / "retrosheet"
 RETROSHEET_URL = "https://www.retrosheet.org"
+CACHE_DIR = BASE_DIR / ".cache"
+MEMORY_LIMIT = "4GB"
+
+# Retrosheet reference CSVs: (zip name, member name, columns)
+TEAMS_CSV = ("teams", "teams.csv",
+             ["team_id", "league", "city", "nickname", "first_year", "last_year"])
+PARKS_CSV = ("ballparks", "ballparks.csv",
+             ["park_id", "name", "aka", "city", "state", "start_date", "end_date", "league", "notes"])
 
 print(f"Database: {DB_PATH}")
 print(f"Retrosheet dir: {RETROSHEET_DIR}")
 
 con = duckdb.connect(str(DB_PATH))
 
+# Bulk-load settings: no ordered materialization, bounded memory, and no
+# automatic checkpoints until the reference load has committed
+con.execute("SET preserve_insertion_order = false")
+con.execute(f"SET memory_limit = '{MEMORY_LIMIT}'")
+con.execute("SET checkpoint_threshold = '16GB'")
+
+
+def write_atomic(path, data):
+    """Write data to path through a temp file, so path is never left partly written."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def fetch_zip(name):
+    """Return the bytes of {name}.zip, using the copy in CACHE_DIR when upstream is unchanged.
+
+    The ETag / Last-Modified of the cached copy are kept in a {name}.zip.etag
+    sidecar and sent as a conditional GET; a 304 reuses the cached zip.
+    """
+    zip_path = CACHE_DIR / f"{name}.zip"
+    etag_path = CACHE_DIR / f"{name}.zip.etag"
+    request = urllib.request.Request(f"{RETROSHEET_URL}/{name}.zip")
+    if zip_path.exists() and etag_path.exists():
+        etag, _, last_modified = etag_path.read_text().partition("\n")
+        if etag:
+            request.add_header("If-None-Match", etag)
+        if last_modified:
+            request.add_header("If-Modified-Since", last_modified)
+    try:
+        with urllib.request.urlopen(request) as response:
+            data = response.read()
+            validators = f"{response.headers.get('ETag', '')}\n{response.headers.get('Last-Modified', '')}"
+    except urllib.error.HTTPError as e:
+        if e.code != 304:
+            raise
+        return zip_path.read_bytes()
+    CACHE_DIR.mkdir(exist_ok=True)
+    # The sidecar goes first and comes back last, so an interrupted write never
+    # leaves validators that would make a later 304 reuse the wrong zip
+    etag_path.unlink(missing_ok=True)
+    write_atomic(zip_path, data)
+    write_atomic(etag_path, validators.encode())
+    return data
+
+
+def fetch_csv(name, member, columns):
+    """Fetch {name}.zip from Retrosheet and parse member straight from memory.
+
+    Returns an all-VARCHAR Arrow table; empty fields become NULL and rows with
+    the wrong number of fields are skipped, as read_csv(ignore_errors) would.
+    The number of skipped rows is reported so the loss is visible.
+    """
+    skipped = []
+
+    def skip_row(row):
+        skipped.append(row.number)
+        return "skip"
+
+    with zipfile.ZipFile(io.BytesIO(fetch_zip(name))) as archive, archive.open(member) as f:
+        table = pacsv.read_csv(
+            f,
+            read_options=pacsv.ReadOptions(column_names=columns, skip_rows=1),
+            parse_options=pacsv.ParseOptions(invalid_row_handler=skip_row),
+            convert_options=pacsv.ConvertOptions(
+                column_types={c: pa.string() for c in columns},
+                strings_can_be_null=True,
+            ),
+        )
+    if skipped:
+        print(f"  Warning: skipped {len(skipped):,} malformed rows in {member} "
+              f"(expected {len(columns)} fields)")
+    return table
+
+
 # ============================================================
 # CREATE TABLES
 # ============================================================
@@ -36,7 +124,7 @@ con.execute("""
 
 con.execute("""
     CREATE TABLE IF NOT EXISTS dim.players (
-        player_id VARCHAR PRIMARY KEY,
+        player_id VARCHAR,  -- Unique index built after the bulk load below
         last_name VARCHAR,
         first_name VARCHAR,
         bats VARCHAR,
@@ -45,9 +133,16 @@ con.execute("""
     )
 """)
 
-# Teams table - already created by setup_database.py
-# Parks table - already created by setup_database.py
-# Skipping table creation since setup_database.py handles this
+# Roster files (name, mtime, size) that dim.players was last built from
+con.execute("""
+    CREATE TABLE IF NOT EXISTS dim.import_manifest (
+        path VARCHAR,
+        mtime_ns BIGINT,
+        size BIGINT
+    )
+""")
+
+# Teams and parks tables are created by setup_database.py and rebuilt below
 
 # ============================================================
 # DOWNLOAD AND IMPORT REFERENCE DATA
@@ -55,69 +150,60 @@ con.execute("""
 
 print("\nDownloading reference data from Retrosheet...")
 
-with tempfile.TemporaryDirectory() as temp_dir:
-    temp_path = Path(temp_dir)
+# Download teams.csv and ballparks.csv concurrently; both are parsed in memory
+# and handed to DuckDB as Arrow tables, never touching the filesystem
+print("  Downloading teams.csv and ballparks.csv...")
+with ThreadPoolExecutor(max_workers=2) as pool:
+    teams_csv, parks_csv = pool.map(lambda spec: fetch_csv(*spec), (TEAMS_CSV, PARKS_CSV))
+con.register("teams_csv", teams_csv)
+con.register("parks_csv", parks_csv)
 
-    # Download teams.csv
-    print("  Downloading teams.csv...")
-    teams_zip = temp_path / "teams.zip"
-    subprocess.run(
-        ["curl", "-s", "-o", str(teams_zip), f"{RETROSHEET_URL}/teams.zip"],
-        check=True
-    )
-    subprocess.run(
-        ["unzip", "-q", "-o", str(teams_zip), "-d", str(temp_path)],
-        check=True
-    )
+# Teams, parks and players are loaded in a single transaction
+con.execute("BEGIN TRANSACTION")
 
-    # Download ballparks.csv
-    print("  Downloading ballparks.csv...")
-    parks_zip = temp_path / "ballparks.zip"
-    subprocess.run(
-        ["curl", "-s", "-o", str(parks_zip), f"{RETROSHEET_URL}/ballparks.zip"],
-        check=True
-    )
-    subprocess.run(
-        ["unzip", "-q", "-o", str(parks_zip), "-d", str(temp_path)],
-        check=True
-    )
+# Teams and parks are rebuilt from the CSVs by CREATE TABLE AS, and their
+# unique indexes are built in one pass afterwards, as for dim.players below.
 
-    # Import teams
-    print("\nImporting teams...")
-    teams_file = temp_path / "teams.csv"
-    with open(teams_file, 'r') as f:
-        reader = csv.reader(f)
-        next(reader)  # Skip header
-        team_count = 0
-        for row in reader:
-            if len(row) >= 6:
-                team_id, league, city, nickname, first_year, last_year = row[:6]
-                # Map to the schema: team_id, city, name, nickname, league, division
-                # Using city as name, nickname stays as is, league as is
-                con.execute("""
-                    INSERT OR REPLACE INTO dim.teams (team_id, city, name, nickname, league)
-                    VALUES (?, ?, ?, ?, ?)
-                """, [team_id, city, city, nickname, league])
-                team_count += 1
-    print(f"  Imported {team_count:,} teams")
-
-    # Import parks
-    print("Importing parks...")
-    parks_file = temp_path / "ballparks.csv"
-    with open(parks_file, 'r') as f:
-        reader = csv.reader(f)
-        next(reader)  # Skip header
-        park_count = 0
-        for row in reader:
-            if len(row) >= 9:
-                park_id, name, aka, city, state, start, end, league, notes = row[:9]
-                # Map to schema: park_id, name, city, state, country
-                con.execute("""
-                    INSERT OR REPLACE INTO dim.parks (park_id, name, city, state)
-                    VALUES (?, ?, ?, ?)
-                """, [park_id, name, city, state])
-                park_count += 1
-    print(f"  Imported {park_count:,} parks")
+# Import teams
+print("\nImporting teams...")
+# Map to the schema: team_id, city, name, nickname, league, division
+# Using city as name, nickname stays as is, league as is.
+con.execute("""
+    CREATE OR REPLACE TABLE dim.teams AS
+    SELECT
+        team_id,
+        city,
+        city AS name,
+        nickname,
+        league,
+        NULL::VARCHAR AS division
+    FROM teams_csv
+    QUALIFY ROW_NUMBER() OVER (PARTITION BY team_id ORDER BY last_year DESC NULLS FIRST) = 1
+""")
+con.execute("CREATE UNIQUE INDEX teams_pk ON dim.teams (team_id)")
+team_count = con.execute("SELECT COUNT(*) FROM dim.teams").fetchone()[0]
+print(f"  Imported {team_count:,} teams")
+
+# Import parks
+print("Importing parks...")
+# Map to schema: park_id, name, city, state, country
+con.execute("""
+    CREATE OR REPLACE TABLE dim.parks AS
+    SELECT
+        park_id,
+        name,
+        city,
+        state,
+        NULL::VARCHAR AS country
+    FROM parks_csv
+    QUALIFY ROW_NUMBER() OVER (
+        PARTITION BY park_id
+        ORDER BY TRY_STRPTIME(end_date, ['%m/%d/%Y', '%Y-%m-%d']) DESC NULLS FIRST, name
+    ) = 1
+""")
+con.execute("CREATE UNIQUE INDEX parks_pk ON dim.parks (park_id)")
+park_count = con.execute("SELECT COUNT(*) FROM dim.parks").fetchone()[0]
+print(f"  Imported {park_count:,} parks")
 
 # ============================================================
 # IMPORT PLAYER DATA FROM ROSTER FILES
@@ -126,37 +212,83 @@ with tempfile.TemporaryDirectory() as temp_dir:
 print("\nImporting player data from roster files...")
 roster_files = sorted(RETROSHEET_DIR.glob("*.ROS"))
 
-players_data = {}
-for roster_file in roster_files:
-    team_id = roster_file.stem[:3]  # e.g., "BOS" from "BOS2024.ROS"
-
-    with open(roster_file, 'r') as f:
-        reader = csv.reader(f)
-        for row in reader:
-            if len(row) >= 7:
-                player_id, last_name, first_name, bats, throws, team, pos = row[:7]
-
-                if player_id not in players_data:
-                    players_data[player_id] = {
-                        'player_id': player_id,
-                        'last_name': last_name,
-                        'first_name': first_name,
-                        'bats': bats,
-                        'throws': throws,
-                        'teams_played': []
-                    }
-
-                if team not in players_data[player_id]['teams_played']:
-                    players_data[player_id]['teams_played'].append(team)
-
-# Insert players
-print(f"  Found {len(players_data):,} unique players")
-for player_id, data in players_data.items():
+roster_stats = [(f.name, st.st_mtime_ns, st.st_size) for f in roster_files for st in [f.stat()]]
+
+# dim.import_manifest records the roster files dim.players was last built
+# from; when none has changed since, the players load is skipped entirely
+manifest = set(con.execute("SELECT path, mtime_ns, size FROM dim.import_manifest").fetchall())
+
+# The parsed players table is also cached as Parquet, keyed on the roster
+# files' names, mtimes and sizes, so a rebuilt database need not re-parse them
+roster_signature = hashlib.sha256(repr(roster_stats).encode()).hexdigest()[:16]
+players_cache = CACHE_DIR / f"players_{roster_signature}.parquet"
+
+# The table is rebuilt by one CREATE TABLE AS, and its unique index is built
+# in one pass afterwards rather than maintained row by row.
+if roster_files and manifest == set(roster_stats):
+    print("  Roster files unchanged since last import, keeping dim.players")
+elif roster_files:
+    if players_cache.exists():
+        print("  Loading players from Parquet cache")
+        con.execute("""
+            CREATE OR REPLACE TABLE dim.players AS
+            SELECT player_id, last_name, first_name, bats, throws, teams_played
+            FROM read_parquet(?)
+        """, [str(players_cache)])
+    else:
+        # Parse, dedupe, and collect teams for every roster file in a single query.
+        # Name/handedness come from the first roster file (in sorted order) listing the player.
+        con.execute("""
+            CREATE OR REPLACE TABLE dim.players AS
+            SELECT
+                player_id,
+                ARG_MIN(last_name, filename) AS last_name,
+                ARG_MIN(first_name, filename) AS first_name,
+                ARG_MIN(bats, filename) AS bats,
+                ARG_MIN(throws, filename) AS throws,
+                LIST(DISTINCT team ORDER BY team) AS teams_played
+            FROM read_csv(?,
+                header = false,
+                auto_detect = false,
+                filename = true,
+                ignore_errors = true,
+                columns = {
+                    'player_id': 'VARCHAR',
+                    'last_name': 'VARCHAR',
+                    'first_name': 'VARCHAR',
+                    'bats': 'VARCHAR',
+                    'throws': 'VARCHAR',
+                    'team': 'VARCHAR',
+                    'pos': 'VARCHAR'
+                })
+            GROUP BY player_id
+        """, [[str(f) for f in roster_files]])
+
+        # Written under a temp name and moved into place; older caches are
+        # only removed once the new one exists
+        CACHE_DIR.mkdir(exist_ok=True)
+        tmp_cache = players_cache.with_name(players_cache.name + ".tmp")
+        con.execute(f"COPY dim.players TO '{tmp_cache}' (FORMAT PARQUET)")
+        os.replace(tmp_cache, players_cache)
+        for stale_cache in CACHE_DIR.glob("players_*.parquet"):
+            if stale_cache != players_cache:
+                stale_cache.unlink()
+
+    con.execute("CREATE UNIQUE INDEX players_pk ON dim.players (player_id)")
+
+    names, mtimes, sizes = (list(column) for column in zip(*roster_stats))
     con.execute("""
-        INSERT OR REPLACE INTO dim.players (player_id, last_name, first_name, bats, throws, teams_played)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, [data['player_id'], data['last_name'], data['first_name'],
-          data['bats'], data['throws'], data['teams_played']])
+        CREATE OR REPLACE TABLE dim.import_manifest AS
+        SELECT
+            UNNEST(?::VARCHAR[]) AS path,
+            UNNEST(?::BIGINT[]) AS mtime_ns,
+            UNNEST(?::BIGINT[]) AS size
+    """, [names, mtimes, sizes])
+print(f"  Processed {len(roster_files):,} roster files")
+
+con.execute("COMMIT")
+con.unregister("teams_csv")
+con.unregister("parks_csv")
 
 # ============================================================
 # SHOW RESULTS
@@ -166,25 +298,34 @@ print("\n" + "="*60)
 print("SUMMARY")
 print("="*60)
 
-player_count = con.execute("SELECT COUNT(*) FROM dim.players").fetchone()[0]
-team_count = con.execute("SELECT COUNT(*) FROM dim.teams").fetchone()[0]
-park_count = con.execute("SELECT COUNT(*) FROM dim.parks").fetchone()[0]
+# Counts and five sample rows per table in one round trip; each sample is a
+# list of structs, which come back as dicts
+(player_count, team_count, park_count,
+ sample_players, sample_teams, sample_parks) = con.execute("""
+    SELECT
+        (SELECT COUNT(*) FROM dim.players),
+        (SELECT COUNT(*) FROM dim.teams),
+        (SELECT COUNT(*) FROM dim.parks),
+        (SELECT LIST(p) FROM (SELECT * FROM dim.players LIMIT 5) p),
+        (SELECT LIST(t) FROM (SELECT * FROM dim.teams LIMIT 5) t),
+        (SELECT LIST(k) FROM (SELECT * FROM dim.parks LIMIT 5) k)
+""").fetchone()
 
 print(f"Players: {player_count:,}")
 print(f"Teams: {team_count:,}")
 print(f"Parks: {park_count:,}")
 
 print("\nSample players:")
-for row in con.execute("SELECT * FROM dim.players LIMIT 5").fetchall():
-    print(f"  {row[2]} {row[1]} ({row[0]}) - bats: {row[3]}, throws: {row[4]}")
+for row in sample_players or []:
+    print(f"  {row['first_name']} {row['last_name']} ({row['player_id']}) - bats: {row['bats']}, throws: {row['throws']}")
 
 print("\nSample teams:")
-for row in con.execute("SELECT * FROM dim.teams LIMIT 5").fetchall():
-    print(f"  {row[2]} {row[3]} ({row[0]}) - {row[1]} ({row[4]}-{row[5]})")
+for row in sample_teams or []:
+    print(f"  {row['name']} {row['nickname']} ({row['team_id']}) - {row['city']} ({row['league']}-{row['division']})")
 
 print("\nSample parks:")
-for row in con.execute("SELECT * FROM dim.parks LIMIT 5").fetchall():
-    print(f"  {row[3]}: {row[1]} ({row[4]})")
+for row in sample_parks or []:
+    print(f"  {row['state']}: {row['name']} ({row['country']})")
 
 con.close()
 print("\nDone!")
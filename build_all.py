@@ -26,6 +26,8 @@ import sys
 import shutil
 import subprocess
 import tempfile
+import threading
+from collections import deque
 from pathlib import Path
 from datetime import datetime
 
@@ -65,6 +67,55 @@ def print_error(text):
 def print_step(text):
     print(f"\n{BLUE}▶ {text}{RESET}")
 
+# Connection shared by the in-process steps. DuckDB lets only one process
+# write to the file, so it is closed before each child script runs.
+_connection = None
+
+def get_connection():
+    """Return the shared DuckDB connection, opening it on first use."""
+    global _connection
+    if _connection is None:
+        import duckdb
+        _connection = duckdb.connect(str(DB_PATH))
+    return _connection
+
+def release_connection():
+    """Close the shared connection so a child process can open the database."""
+    global _connection
+    if _connection is not None:
+        _connection.close()
+        _connection = None
+
+def stream_process(cmd, timeout, tail_lines=20):
+    """Run cmd, echoing its combined stdout/stderr live; return (returncode, last lines).
+
+    Only the last tail_lines lines are kept in memory, so long-running steps
+    don't buffer their whole output. Raises subprocess.TimeoutExpired if the
+    process runs longer than timeout seconds.
+    """
+    release_connection()
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1
+    )
+    timer = threading.Timer(timeout, proc.kill)
+    timer.start()
+    tail = deque(maxlen=tail_lines)
+    try:
+        for line in proc.stdout:
+            print(f"    {line}", end='')
+            tail.append(line)
+        returncode = proc.wait()
+    finally:
+        timed_out = not timer.is_alive()
+        timer.cancel()
+    if timed_out:
+        raise subprocess.TimeoutExpired(cmd, timeout)
+    return returncode, list(tail)
+
 def run_script(script_path, description, timeout=600000):
     """Run a Python script and return success status."""
     print_step(description)
@@ -77,26 +128,15 @@ def run_script(script_path, description, timeout=600000):
     python_exe = str(VENV_PYTHON) if VENV_PYTHON.exists() else "python3"
 
     print(f"  Running: {script_path.name}")
-    result = subprocess.run(
-        [python_exe, str(script_path)],
-        capture_output=True,
-        text=True,
-        timeout=timeout
-    )
+    returncode, tail = stream_process([python_exe, str(script_path)], timeout)
 
-    if result.returncode == 0:
+    if returncode == 0:
         print_success(f"{description} - Complete")
-        # Print last few lines of output for context
-        if result.stdout:
-            lines = result.stdout.strip().split('\n')
-            for line in lines[-5:]:
-                if line.strip():
-                    print(f"    {line}")
         return True
     else:
         print_error(f"{description} - Failed")
-        if result.stderr:
-            print(f"    Error: {result.stderr[-500:]}")
+        if tail:
+            print(f"    Error: {''.join(tail)[-500:]}")
         return False
 
 def setup_database():
@@ -127,12 +167,13 @@ def add_reference_data():
 
     # Show summary
     try:
-        import duckdb
-        con = duckdb.connect(str(DB_PATH), read_only=False)
-        player_count = con.execute("SELECT COUNT(*) FROM dim.players").fetchone()[0]
-        team_count = con.execute("SELECT COUNT(*) FROM dim.teams").fetchone()[0]
-        park_count = con.execute("SELECT COUNT(*) FROM dim.parks").fetchone()[0]
-        con.close()
+        con = get_connection()
+        player_count, team_count, park_count = con.execute("""
+            SELECT
+                (SELECT COUNT(*) FROM dim.players),
+                (SELECT COUNT(*) FROM dim.teams),
+                (SELECT COUNT(*) FROM dim.parks)
+        """).fetchone()
 
         print_success(f"Reference data imported:")
         print(f"    Players: {player_count:,}")
@@ -160,17 +201,12 @@ def import_historical_data(years=None):
 
     # Show summary
     try:
-        import duckdb
-        con = duckdb.connect(str(DB_PATH), read_only=False)
+        con = get_connection()
         result = con.execute("""
-            SELECT
-                SUBSTRING(game_id, 4, 4) as year,
-                COUNT(*) as event_count
-            FROM event.events
-            GROUP BY year
+            SELECT year, event_count
+            FROM meta.years_loaded
             ORDER BY year DESC
         """).fetchall()
-        con.close()
 
         if result:
             print_success(f"Event data imported for {len(result)} years:")
@@ -183,8 +219,7 @@ def import_historical_data(years=None):
 
     # Verify critical tables exist
     try:
-        import duckdb
-        con = duckdb.connect(str(DB_PATH), read_only=False)
+        con = get_connection()
 
         # Critical tables required for advanced analytics
         critical_tables = [
@@ -193,16 +228,16 @@ def import_historical_data(years=None):
             ('event', 'event_pitch_sequences'),
         ]
 
-        missing_tables = []
-        for schema, table in critical_tables:
-            result = con.execute(f"""
-                SELECT COUNT(*) FROM information_schema.tables
-                WHERE table_schema = '{schema}' AND table_name = '{table}'
-            """).fetchone()[0]
-            if result == 0:
-                missing_tables.append(f'{schema}.{table}')
-
-        con.close()
+        existing = {
+            f'{schema}.{table}' for schema, table in con.execute("""
+                SELECT table_schema, table_name FROM information_schema.tables
+                WHERE table_schema = 'event'
+            """).fetchall()
+        }
+        missing_tables = [
+            f'{schema}.{table}' for schema, table in critical_tables
+            if f'{schema}.{table}' not in existing
+        ]
 
         if missing_tables:
             print_error(f"Critical tables missing after import: {', '.join(missing_tables)}")
@@ -233,29 +268,13 @@ def build_defensive_stats():
 
     # Read and execute SQL
     try:
-        import duckdb
-        con = duckdb.connect(str(DB_PATH), read_only=False)
-
-        with open(sql_script, 'r') as f:
-            sql = f.read()
+        con = get_connection()
 
-        # Split and execute statements
-        # Remove comments first
-        sql_lines = []
-        for line in sql.split('\n'):
-            if '--' in line and not line.strip().startswith('--'):
-                sql_lines.append(line.split('--')[0])
-            elif not line.strip().startswith('--'):
-                sql_lines.append(line)
-
-        sql = '\n'.join(sql_lines)
-
-        # Execute the main table creation
-        con.execute(sql)
+        # DuckDB's parser handles comments and multiple statements itself
+        con.execute(sql_script.read_text())
 
         # Verify
         result = con.execute("SELECT COUNT(*) FROM defensive_stats").fetchone()[0]
-        con.close()
 
         print_success(f"Defensive stats created: {result:,} records")
         return True
@@ -277,28 +296,18 @@ def build_dbt_models():
 
     print(f"  Running: {analytics_script.name}")
 
-    result = subprocess.run(
+    returncode, tail = stream_process(
         [str(VENV_PYTHON), str(analytics_script)],
-        capture_output=True,
-        text=True,
         timeout=1800  # 30 minutes
     )
 
-    if result.returncode == 0:
+    if returncode == 0:
         print_success("Advanced analytics tables created")
-
-        # Show summary from output
-        if result.stdout:
-            lines = result.stdout.strip().split('\n')
-            for line in lines[-20:]:
-                if 'Created:' in line or 'records' in line:
-                    print(f"    {line.strip()}")
-
         return True
     else:
         print_error("Failed to create advanced analytics tables")
-        if result.stderr:
-            print(f"    Error: {result.stderr[-500:]}")
+        if tail:
+            print(f"    Error: {''.join(tail)[-500:]}")
         return False
 
 def add_lahman_validation():
@@ -330,12 +339,11 @@ def verify_database():
     print_header("FINAL VERIFICATION")
 
     try:
-        import duckdb
-        con = duckdb.connect(str(DB_PATH), read_only=True)
+        con = get_connection()
 
         # Check tables
         tables = con.execute("""
-            SELECT table_schema, table_name
+            SELECT table_schema, table_name, table_type
             FROM information_schema.tables
             WHERE table_schema NOT IN ('system', 'pg_catalog', 'information_schema')
             ORDER BY table_schema, table_name
@@ -351,6 +359,7 @@ def verify_database():
             (None, 'defensive_stats'),
             # advanced analytics models
             (None, 'metrics_player_season_league_offense'),
+            (None, 'metrics_offense_qualified'),
             (None, 'metrics_player_season_league_pitching'),
             (None, 'park_factors'),
             (None, 'event_baserunning_stats'),
@@ -363,19 +372,40 @@ def verify_database():
             ('validation', 'lahman_teams'),
         ]
 
-        for schema, table in key_tables:
-            if schema:
-                full_name = f"{schema}.{table}"
+        # Row counts come from duckdb_tables().estimated_size, which is catalog
+        # metadata and scans nothing. Key tables that exist but report no
+        # estimate (empty tables) are counted in one UNION ALL query. Views are
+        # reported as views: counting one would run its whole query.
+        existing = {(schema, table) for schema, table, table_type in tables if table_type != 'VIEW'}
+        views = {(schema, table) for schema, table, table_type in tables if table_type == 'VIEW'}
+        full_names = [f"{schema}.{table}" if schema else table for schema, table in key_tables]
+        key_values = ", ".join(
+            f"('{full_name}', '{schema or 'main'}', '{table}')"
+            for full_name, (schema, table) in zip(full_names, key_tables)
+        )
+        counts = dict(con.execute(f"""
+            SELECT k.full_name, t.estimated_size
+            FROM (VALUES {key_values}) AS k(full_name, schema_name, table_name)
+            JOIN duckdb_tables() t USING (schema_name, table_name)
+            WHERE t.estimated_size > 0
+        """).fetchall())
+        to_count = [
+            full_name for full_name, (schema, table) in zip(full_names, key_tables)
+            if full_name not in counts and (schema or 'main', table) in existing
+        ]
+        if to_count:
+            counts.update(con.execute(" UNION ALL ".join(
+                f"SELECT '{full_name}', COUNT(*) FROM {full_name}" for full_name in to_count
+            )).fetchall())
+
+        for full_name, (schema, table) in zip(full_names, key_tables):
+            if full_name in counts:
+                print(f"    {full_name}: {counts[full_name]:,} records")
+            elif (schema or 'main', table) in views:
+                print(f"    {full_name}: view")
             else:
-                full_name = table
-
-            try:
-                count = con.execute(f"SELECT COUNT(*) FROM {full_name}").fetchone()[0]
-                print(f"    {full_name}: {count:,} records")
-            except:
                 print(f"    {full_name}: (empty or not found)")
 
-        con.close()
         return True
 
     except Exception as e:
@@ -463,6 +493,8 @@ def main():
             failed_steps.append(step_name)
             break
 
+    release_connection()
+
     # Final summary
     print_header("BUILD SUMMARY")
 
@@ -5,251 +5,94 @@ Bypasses dbt to work with our imported data structure.
 """
 
 import duckdb
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Use script directory for portability
 BASE_DIR = Path(__file__).parent.resolve()
 DB_PATH = BASE_DIR / "baseball.duckdb"
+MEMORY_LIMIT = "8GB"
 
 con = duckdb.connect(str(DB_PATH), read_only=False)
 
+# Bulk CREATE TABLE AS settings: no ordered materialization and bounded memory
+# (threads already defaults to the number of cores)
+con.execute("SET preserve_insertion_order = false")
+con.execute(f"SET memory_limit = '{MEMORY_LIMIT}'")
+
 print("="*70)
 print("Creating Advanced Analytics Tables")
 print("="*70)
 
-# ============================================================
-# 1. Player Season League Offense
-# ============================================================
-print("\n1. Creating metrics_player_season_league_offense...")
-
-con.execute("DROP TABLE IF EXISTS metrics_player_season_league_offense")
-
-con.execute("""
-    CREATE TABLE metrics_player_season_league_offense AS
-    WITH event_stats AS (
-        SELECT
-            SUBSTRING(e.game_id, 4, 4)::INT AS season,
-            e.batting_team_id AS team_id,
-            e.batter_id AS player_id,
-            COUNT(*) AS plate_appearances,
-            SUM(CASE WHEN e.plate_appearance_result IN ('Single', 'Double', 'Triple', 'HomeRun', 'InsideTheParkHomeRun', 'GroundRuleDouble', 'InPlayOut', 'StrikeOut', 'FieldersChoice', 'ReachedOnError') THEN 1 ELSE 0 END) AS at_bats,
-            SUM(CASE WHEN e.plate_appearance_result IN ('Single', 'Double', 'Triple', 'HomeRun', 'InsideTheParkHomeRun', 'GroundRuleDouble') THEN 1 ELSE 0 END) AS hits,
-            SUM(CASE WHEN e.plate_appearance_result = 'Double' THEN 1 ELSE 0 END) AS doubles,
-            SUM(CASE WHEN e.plate_appearance_result = 'Triple' THEN 1 ELSE 0 END) AS triples,
-            SUM(CASE WHEN e.plate_appearance_result IN ('HomeRun', 'InsideTheParkHomeRun') THEN 1 ELSE 0 END) AS home_runs,
-            SUM(CASE WHEN e.plate_appearance_result = 'Walk' THEN 1 ELSE 0 END) AS walks,
-            SUM(CASE WHEN e.plate_appearance_result = 'IntentionalWalk' THEN 1 ELSE 0 END) AS intentional_walks,
-            SUM(CASE WHEN e.plate_appearance_result = 'HitByPitch' THEN 1 ELSE 0 END) AS hit_by_pitch,
-            SUM(CASE WHEN e.plate_appearance_result = 'SacrificeHit' THEN 1 ELSE 0 END) AS sacrifice_bunts,
-            SUM(CASE WHEN e.plate_appearance_result = 'SacrificeFly' THEN 1 ELSE 0 END) AS sacrifice_flies,
-            SUM(CASE WHEN e.plate_appearance_result = 'StrikeOut' THEN 1 ELSE 0 END) AS strikeouts,
-            SUM(e.runs_batted_in) AS runs_batted_in,
-            SUM(e.runs_on_play) AS runs
-        FROM event.events e
-        LEFT JOIN game.games g ON e.game_id = g.game_id
-        WHERE e.batter_id IS NOT NULL
-        GROUP BY season, team_id, player_id
-    ),
-    calculated AS (
-        SELECT *,
-            hits + walks + hit_by_pitch AS times_on_base,
-            at_bats + walks + hit_by_pitch + sacrifice_flies AS plate_appearances_for_obp,
-            hits - doubles - triples - home_runs AS singles,
-            doubles + 2*triples + 3*home_runs AS total_bases
-        FROM event_stats
-    )
-    SELECT
-        c.season,
-        c.team_id,
-        c.player_id,
-        p.first_name,
-        p.last_name,
-        c.plate_appearances,
-        c.at_bats,
-        c.runs,
-        c.hits,
-        c.doubles,
-        c.triples,
-        c.home_runs,
-        c.runs_batted_in,
-        c.walks,
-        c.intentional_walks,
-        c.hit_by_pitch,
-        c.sacrifice_bunts,
-        c.sacrifice_flies,
-        c.strikeouts,
-        c.singles,
-        c.total_bases,
-        ROUND(CAST(c.hits AS DOUBLE) / NULLIF(c.at_bats, 0), 3) AS batting_average,
-        ROUND(CAST(c.times_on_base AS DOUBLE) / NULLIF(c.plate_appearances_for_obp, 0), 3) AS on_base_percentage,
-        ROUND(CAST(c.total_bases AS DOUBLE) / NULLIF(c.at_bats, 0), 3) AS slugging_percentage,
-        ROUND(CAST(c.times_on_base AS DOUBLE) / NULLIF(c.plate_appearances_for_obp, 0) + CAST(c.total_bases AS DOUBLE) / NULLIF(c.at_bats, 0), 3) AS ops
-    FROM calculated c
-    LEFT JOIN dim.players p ON c.player_id = p.player_id
-""")
-
-count = con.execute("SELECT COUNT(*) FROM metrics_player_season_league_offense").fetchone()[0]
-print(f"   Created: {count:,} player-season offensive records")
-
-# ============================================================
-# 2. Player Season League Pitching
-# ============================================================
-print("\n2. Creating metrics_player_season_league_pitching...")
-
-con.execute("DROP TABLE IF EXISTS metrics_player_season_league_pitching")
-
-con.execute("""
-    CREATE TABLE metrics_player_season_league_pitching AS
-    WITH event_stats AS (
-        SELECT
-            SUBSTRING(e.game_id, 4, 4)::INT AS season,
-            e.fielding_team_id AS team_id,
-            e.pitcher_id AS player_id,
-            COUNT(*) AS batters_faced,
-            SUM(CASE WHEN e.plate_appearance_result NOT IN ('SacrificeHit', 'SacrificeFly', 'IntentionalWalk', 'HitByPitch', 'Interference') THEN 1 ELSE 0 END) AS at_bats_against,
-            SUM(CASE WHEN e.plate_appearance_result IN ('Single', 'Double', 'Triple', 'HomeRun', 'InsideTheParkHomeRun', 'GroundRuleDouble') THEN 1 ELSE 0 END) AS hits,
-            SUM(CASE WHEN e.plate_appearance_result IN ('Walk', 'IntentionalWalk') THEN 1 ELSE 0 END) AS walks,
-            SUM(CASE WHEN e.plate_appearance_result = 'IntentionalWalk' THEN 1 ELSE 0 END) AS intentional_walks,
-            SUM(CASE WHEN e.plate_appearance_result = 'HitByPitch' THEN 1 ELSE 0 END) AS hit_by_pitch,
-            SUM(CASE WHEN e.plate_appearance_result = 'StrikeOut' THEN 1 ELSE 0 END) AS strikeouts,
-            SUM(CASE WHEN e.plate_appearance_result IN ('HomeRun', 'InsideTheParkHomeRun') THEN 1 ELSE 0 END) AS home_runs,
-            SUM(e.runs_on_play) AS runs,
-            SUM(e.team_unearned_runs) AS unearned_runs
-        FROM event.events e
-        LEFT JOIN game.games g ON e.game_id = g.game_id
-        WHERE e.pitcher_id IS NOT NULL
-        GROUP BY season, team_id, player_id
-    ),
-    calculated AS (
-        SELECT *,
-            at_bats_against - hits - walks - hit_by_pitch AS outs_recorded,
-            hits + walks - hit_by_pitch AS base_on_balls,
-            at_bats_against AS batters_faced_for_whip
-        FROM event_stats
-    )
-    SELECT
-        c.season,
-        c.team_id,
-        c.player_id,
-        p.first_name,
-        p.last_name,
-        c.batters_faced,
-        c.at_bats_against,
-        c.outs_recorded,
-        ROUND(c.outs_recorded / 3.0, 1) AS innings_pitched,
-        c.hits,
-        c.walks,
-        c.intentional_walks,
-        c.hit_by_pitch,
-        c.strikeouts,
-        c.home_runs,
-        c.runs,
-        c.unearned_runs,
-        c.runs - c.unearned_runs AS earned_runs,
-        ROUND(CAST(c.base_on_balls AS DOUBLE) / NULLIF(c.batters_faced_for_whip, 0), 3) AS whip,
-        ROUND(CAST((c.runs - c.unearned_runs) * 9 AS DOUBLE) / NULLIF(c.outs_recorded, 0), 2) AS era,
-        ROUND(CAST(c.strikeouts * 9 AS DOUBLE) / NULLIF(c.outs_recorded, 0), 1) AS k_per_9,
-        ROUND(CAST(c.walks * 9 AS DOUBLE) / NULLIF(c.outs_recorded, 0), 1) AS bb_per_9,
-        ROUND(CAST(c.home_runs * 9 AS DOUBLE) / NULLIF(c.outs_recorded, 0), 1) AS hr_per_9,
-        ROUND(CAST(c.strikeouts AS DOUBLE) / NULLIF(c.batters_faced, 0), 3) AS k_rate,
-        ROUND(CAST(c.walks AS DOUBLE) / NULLIF(c.batters_faced, 0), 3) AS bb_rate
-    FROM calculated c
-    LEFT JOIN dim.players p ON c.player_id = p.player_id
-""")
-
-count = con.execute("SELECT COUNT(*) FROM metrics_player_season_league_pitching").fetchone()[0]
-print(f"   Created: {count:,} player-season pitching records")
-
-# ============================================================
-# 3. Park Factors
-# ============================================================
-print("\n3. Creating park_factors...")
-
-con.execute("DROP TABLE IF EXISTS park_factors")
-
-con.execute("""
-    CREATE TABLE park_factors AS
-    WITH home_games AS (
-        SELECT
-            SUBSTRING(e.game_id, 4, 4)::INT AS season,
-            g.park_id,
-            g.home_team_id,
-            SUM(CASE WHEN e.plate_appearance_result = 'StrikeOut' OR e.plate_appearance_result IN ('Single', 'Double', 'Triple', 'HomeRun', 'InsideTheParkHomeRun', 'GroundRuleDouble', 'InPlayOut', 'FieldersChoice', 'ReachedOnError') THEN 1 ELSE 0 END) AS outs,
-            SUM(CASE WHEN e.plate_appearance_result IN ('Single', 'Double', 'Triple', 'HomeRun', 'InsideTheParkHomeRun', 'GroundRuleDouble') THEN 1 ELSE 0 END) AS hits,
-            SUM(CASE WHEN e.plate_appearance_result IN ('HomeRun', 'InsideTheParkHomeRun') THEN 1 ELSE 0 END) AS home_runs,
-            SUM(e.runs_on_play) AS runs
-        FROM event.events e
-        LEFT JOIN game.games g ON e.game_id = g.game_id
-        WHERE e.batter_id IS NOT NULL
-        GROUP BY season, g.park_id, g.home_team_id
-    ),
-    league_avg AS (
-        SELECT
-            season,
-            SUM(outs) AS total_outs,
-            SUM(hits) AS total_hits,
-            SUM(home_runs) AS total_home_runs,
-            SUM(runs) AS total_runs
-        FROM home_games
-        GROUP BY season
-    ),
-    park_factors_calc AS (
-        SELECT
-            hg.season,
-            hg.park_id,
-            p.name AS park_name,
-            p.city AS park_city,
-            COUNT(*) AS games,
-            SUM(hg.outs) AS outs,
-            SUM(hg.hits) AS hits,
-            SUM(hg.home_runs) AS home_runs,
-            SUM(hg.runs) AS runs,
-            CAST(SUM(hg.hits) AS DOUBLE) / NULLIF(SUM(hg.outs), 0) AS h_per_out,
-            CAST(SUM(hg.home_runs) AS DOUBLE) / NULLIF(SUM(hg.outs), 0) AS hr_per_out,
-            CAST(SUM(hg.runs) AS DOUBLE) / NULLIF(SUM(hg.outs), 0) AS r_per_out
-        FROM home_games hg
-        LEFT JOIN league_avg la ON hg.season = la.season
-        LEFT JOIN dim.parks p ON hg.park_id = p.park_id
-        GROUP BY hg.season, hg.park_id, p.name, p.city
-    ),
-    with_league_avg AS (
-        SELECT
-            pfc.*,
-            (CAST(la.total_hits AS DOUBLE) / NULLIF(la.total_outs, 0)) AS league_h_per_out,
-            (CAST(la.total_home_runs AS DOUBLE) / NULLIF(la.total_outs, 0)) AS league_hr_per_out,
-            (CAST(la.total_runs AS DOUBLE) / NULLIF(la.total_outs, 0)) AS league_r_per_out
-        FROM park_factors_calc pfc
-        LEFT JOIN league_avg la ON pfc.season = la.season
-    )
-    SELECT
-        season,
-        park_id,
-        park_name,
-        park_city,
-        games,
-        ROUND(h_per_out / NULLIF(league_h_per_out, 0), 3) AS park_factor_hits,
-        ROUND(hr_per_out / NULLIF(league_hr_per_out, 0), 3) AS park_factor_home_runs,
-        ROUND(r_per_out / NULLIF(league_r_per_out, 0), 3) AS park_factor_runs,
-        ROUND((h_per_out / NULLIF(league_h_per_out, 0) + hr_per_out / NULLIF(league_hr_per_out, 0) + r_per_out / NULLIF(league_r_per_out, 0)) / 3, 3) AS park_factor_overall
-    FROM with_league_avg
-""")
+# Databases imported before event.events carried a season column get it
+# backfilled once, so every query below can read it instead of parsing game_id.
+# Newer databases are filled at import and skip the UPDATE entirely.
+has_season = con.execute("""
+    SELECT COUNT(*) FROM duckdb_columns()
+    WHERE schema_name = 'event' AND table_name = 'events' AND column_name = 'season'
+""").fetchone()[0]
+if not has_season:
+    con.execute("ALTER TABLE event.events ADD COLUMN season SMALLINT")
+    con.execute("UPDATE event.events SET season = SUBSTRING(game_id, 4, 4)::SMALLINT")
+
+# Likewise plate_appearance_result is stored as a 1-byte PA_RESULT_ENUM code
+# rather than a string (see setup_database.py)
+pa_result_type = con.execute("""
+    SELECT data_type FROM duckdb_columns()
+    WHERE schema_name = 'event' AND table_name = 'events' AND column_name = 'plate_appearance_result'
+""").fetchone()[0]
+if pa_result_type == "VARCHAR":
+    if not con.execute("SELECT COUNT(*) FROM duckdb_types() WHERE type_name = 'PA_RESULT_ENUM'").fetchone()[0]:
+        con.execute("""
+            CREATE TYPE PA_RESULT_ENUM AS ENUM (
+                'InPlayOut', 'StrikeOut', 'ReachedOnError', 'FieldersChoice',
+                'SacrificeFly', 'SacrificeHit', 'Walk', 'HitByPitch', 'IntentionalWalk',
+                'Interference', 'Single', 'Double', 'GroundRuleDouble', 'Triple',
+                'HomeRun', 'InsideTheParkHomeRun'
+            )
+        """)
+    con.execute("ALTER TABLE event.events ALTER plate_appearance_result TYPE PA_RESULT_ENUM")
+
+# Refresh distinct-count statistics so the joins below are planned from the
+# current sizes of the event, game and dim tables
+for table in ("event.events", "event.event_baserunners", "game.games", "dim.players", "dim.parks"):
+    con.execute(f"ANALYZE {table}")
+
+
+def drop_relation(name):
+    """Drop name from the main schema, whether it exists as a table or a view."""
+    row = con.execute("""
+        SELECT table_type FROM information_schema.tables
+        WHERE table_schema = 'main' AND table_name = ?
+    """, [name]).fetchone()
+    if row:
+        con.execute(f"DROP {'VIEW' if row[0] == 'VIEW' else 'TABLE'} {name}")
+
+
+def pa_results(*results):
+    """Render results as a SQL list of PA_RESULT_ENUM literals.
+
+    Comparing the enum column against plain string literals makes DuckDB cast
+    every value to VARCHAR; typed literals keep the comparison on enum codes.
+    """
+    return ", ".join(f"'{result}'::PA_RESULT_ENUM" for result in results)
 
-count = con.execute("SELECT COUNT(*) FROM park_factors").fetchone()[0]
-print(f"   Created: {count:,} park-season records")
 
 # ============================================================
 # 4. Event Baserunning Stats
 # ============================================================
-print("\n4. Creating event_baserunning_stats...")
+print("\n4. Creating event_baserunning_stats view...")
 
-con.execute("DROP TABLE IF EXISTS event_baserunning_stats")
+# A plain projection of events and baserunners, so it is a view rather than
+# a copy of both tables
+drop_relation("event_baserunning_stats")
 
 con.execute("""
-    CREATE TABLE event_baserunning_stats AS
+    CREATE VIEW event_baserunning_stats AS
     SELECT
         e.game_id,
         e.event_id,
-        SUBSTRING(e.game_id, 4, 4)::INT AS season,
+        e.season,
         b.runner_id AS baserunner_id,
         b.baserunner AS baserunner_position,
         b.attempted_advance_to_base,
@@ -258,26 +101,27 @@ con.execute("""
         b.run_scored_flag AS runs_scored_on_play,
         b.rbi_flag AS is_rbi
     FROM event.events e
-    LEFT JOIN event.event_baserunners b ON e.event_id = b.event_id AND e.event_key = b.event_key
+    JOIN event.event_baserunners b ON e.event_id = b.event_id AND e.event_key = b.event_key
     WHERE b.runner_id IS NOT NULL
 """)
 
-count = con.execute("SELECT COUNT(*) FROM event_baserunning_stats").fetchone()[0]
-print(f"   Created: {count:,} baserunning event records")
+print("   Created view over event.events and event.event_baserunners")
 
 # ============================================================
 # 5. Calc Batted Ball Type
 # ============================================================
-print("\n5. Creating calc_batted_ball_type...")
+print("\n5. Creating calc_batted_ball_type view...")
 
-con.execute("DROP TABLE IF EXISTS calc_batted_ball_type")
+# Also a row-level projection of events; only the aggregate built from it
+# below is materialized
+drop_relation("calc_batted_ball_type")
 
-con.execute("""
-    CREATE TABLE calc_batted_ball_type AS
+con.execute(f"""
+    CREATE VIEW calc_batted_ball_type AS
     SELECT
         e.game_id,
         e.event_id,
-        SUBSTRING(e.game_id, 4, 4)::INT AS season,
+        e.season,
         e.batter_id,
         e.pitcher_id,
         e.batted_trajectory,
@@ -285,65 +129,367 @@ con.execute("""
             WHEN e.batted_trajectory IN ('fly_ball', 'popup') THEN 'fly_ball'
             WHEN e.batted_trajectory = 'ground_ball' THEN 'ground_ball'
             WHEN e.batted_trajectory = 'line_drive' THEN 'line_drive'
-            WHEN e.batted_trajectory IS NULL AND e.plate_appearance_result IN ('Single', 'Double', 'Triple', 'HomeRun') THEN 'unknown'
+            WHEN e.batted_trajectory IS NULL AND e.plate_appearance_result IN ({pa_results('Single', 'Double', 'Triple', 'HomeRun')}) THEN 'unknown'
             ELSE NULL
         END AS batted_ball_type,
         e.batted_location_general,
         e.batted_location_depth,
-        e.plate_appearance_result
+        e.plate_appearance_result,
+        e.outs_on_play
     FROM event.events e
-    WHERE e.batted_trajectory IS NOT NULL OR e.plate_appearance_result IN ('Single', 'Double', 'Triple', 'HomeRun')
+    WHERE e.batted_trajectory IS NOT NULL OR e.plate_appearance_result IN ({pa_results('Single', 'Double', 'Triple', 'HomeRun')})
 """)
 
-count = con.execute("SELECT COUNT(*) FROM calc_batted_ball_type").fetchone()[0]
-print(f"   Created: {count:,} batted ball classifications")
+print("   Created view over event.events")
 
 # ============================================================
-# 6. Event Batted Ball Stats
+# Plate appearance result flags
 # ============================================================
-print("\n6. Creating event_batted_ball_stats...")
 
-con.execute("DROP TABLE IF EXISTS event_batted_ball_stats")
+def create_pa_flags(cur):
+    """Create the temp pa_flags table on cur.
+
+    One row per plate appearance result, plus NULL for events that are not
+    plate appearances, with a 0/1 flag for each counting stat. The aggregations
+    below join to this table once and SUM the flags rather than evaluating
+    IN-lists against every event row. Temp tables are private to a connection,
+    so each builder creates its own copy.
+    """
+    cur.execute("""
+        CREATE OR REPLACE TEMP TABLE pa_flags AS
+        SELECT
+            result::PA_RESULT_ENUM AS plate_appearance_result,
+            COALESCE(result IN ('Single', 'Double', 'Triple', 'HomeRun', 'InsideTheParkHomeRun', 'GroundRuleDouble', 'InPlayOut', 'StrikeOut', 'FieldersChoice', 'ReachedOnError'), false)::TINYINT AS is_at_bat,
+            COALESCE(result NOT IN ('SacrificeHit', 'SacrificeFly', 'IntentionalWalk', 'HitByPitch', 'Interference'), false)::TINYINT AS is_at_bat_against,
+            COALESCE(result IN ('Single', 'Double', 'Triple', 'HomeRun', 'InsideTheParkHomeRun', 'GroundRuleDouble'), false)::TINYINT AS is_hit,
+            COALESCE(result = 'Double', false)::TINYINT AS is_double,
+            COALESCE(result = 'Triple', false)::TINYINT AS is_triple,
+            COALESCE(result IN ('HomeRun', 'InsideTheParkHomeRun'), false)::TINYINT AS is_home_run,
+            COALESCE(result = 'Walk', false)::TINYINT AS is_walk,
+            COALESCE(result = 'IntentionalWalk', false)::TINYINT AS is_intentional_walk,
+            COALESCE(result = 'HitByPitch', false)::TINYINT AS is_hit_by_pitch,
+            COALESCE(result = 'SacrificeHit', false)::TINYINT AS is_sacrifice_hit,
+            COALESCE(result = 'SacrificeFly', false)::TINYINT AS is_sacrifice_fly,
+            COALESCE(result = 'StrikeOut', false)::TINYINT AS is_strikeout
+        FROM (SELECT UNNEST(enum_range(NULL::PA_RESULT_ENUM) || [NULL]) AS result)
+    """)
+
 
-con.execute("""
-    CREATE TABLE event_batted_ball_stats AS
-    WITH batted_types AS (
+# ============================================================
+# 1-2. Player Season League Offense and Pitching
+# ============================================================
+
+def build_player_metrics(cur):
+    """Build the offense, qualified-offense and pitching tables from one grouped scan of event.events."""
+    create_pa_flags(cur)
+
+    # Batting and pitching lines come from a single scan of event.events with two
+    # grouping sets: (season, batter) and (season, pitcher). Columns outside a
+    # row's grouping set are NULL, so COALESCE picks out its player, and
+    # GROUPING(e.batter_id) = 0 marks batting rows. A player traded mid-season
+    # gets one line, credited to the team with the most of those events.
+    cur.execute("""
+        CREATE OR REPLACE TEMP TABLE player_season_events AS
         SELECT
-            e.game_id,
-            e.event_id,
-            SUBSTRING(e.game_id, 4, 4)::INT AS season,
-            e.batter_id,
-            e.pitcher_id,
-            e.batted_trajectory,
-            CASE
-                WHEN e.batted_trajectory IN ('fly_ball', 'popup') THEN 'fly_ball'
-                WHEN e.batted_trajectory = 'ground_ball' THEN 'ground_ball'
-                WHEN e.batted_trajectory = 'line_drive' THEN 'line_drive'
-                WHEN e.batted_trajectory IS NULL AND e.plate_appearance_result IN ('Single', 'Double', 'Triple', 'HomeRun') THEN 'unknown'
-                ELSE NULL
-            END AS batted_ball_type,
-            e.plate_appearance_result,
-            e.batted_location_general,
-            e.outs_on_play
+            GROUPING(e.batter_id) = 0 AS is_batting,
+            e.season,
+            CASE WHEN GROUPING(e.batter_id) = 0 THEN MODE(e.batting_team_id) ELSE MODE(e.fielding_team_id) END AS team_id,
+            COALESCE(e.batter_id, e.pitcher_id) AS player_id,
+            COUNT(*) AS events,
+            SUM(f.is_at_bat) AS at_bats,
+            SUM(f.is_at_bat_against) AS at_bats_against,
+            SUM(f.is_hit) AS hits,
+            SUM(f.is_double) AS doubles,
+            SUM(f.is_triple) AS triples,
+            SUM(f.is_home_run) AS home_runs,
+            SUM(f.is_walk) AS walks,
+            SUM(f.is_intentional_walk) AS intentional_walks,
+            SUM(f.is_hit_by_pitch) AS hit_by_pitch,
+            SUM(f.is_sacrifice_hit) AS sacrifice_bunts,
+            SUM(f.is_sacrifice_fly) AS sacrifice_flies,
+            SUM(f.is_strikeout) AS strikeouts,
+            SUM(e.runs_batted_in) AS runs_batted_in,
+            SUM(e.runs_on_play) AS runs,
+            SUM(e.team_unearned_runs) AS unearned_runs
         FROM event.events e
-    )
-    SELECT
-        season,
-        batter_id,
-        pitcher_id,
-        batted_ball_type,
-        batted_trajectory,
-        COUNT(*) AS balls_in_play,
-        SUM(CASE WHEN plate_appearance_result IN ('Single', 'Double', 'Triple', 'HomeRun') THEN 1 ELSE 0 END) AS hits,
-        SUM(CASE WHEN outs_on_play > 0 THEN 1 ELSE 0 END) AS outs,
-        ROUND(CAST(SUM(CASE WHEN plate_appearance_result IN ('Single', 'Double', 'Triple', 'HomeRun') THEN 1 ELSE 0 END) AS DOUBLE) / NULLIF(COUNT(*), 0), 3) AS batting_average
-    FROM batted_types
-    WHERE batted_ball_type IS NOT NULL
-    GROUP BY season, batter_id, pitcher_id, batted_ball_type, batted_trajectory
-""")
+        JOIN pa_flags f ON e.plate_appearance_result IS NOT DISTINCT FROM f.plate_appearance_result
+        GROUP BY GROUPING SETS ((e.season, e.batter_id), (e.season, e.pitcher_id))
+        HAVING COALESCE(e.batter_id, e.pitcher_id) IS NOT NULL
+    """)
+
+    cur.execute("DROP TABLE IF EXISTS metrics_player_season_league_offense")
+
+    offense = cur.execute("""
+        CREATE TABLE metrics_player_season_league_offense AS
+        WITH event_stats AS (
+            SELECT
+                season,
+                team_id,
+                player_id,
+                events AS plate_appearances,
+                at_bats,
+                hits,
+                doubles,
+                triples,
+                home_runs,
+                walks,
+                intentional_walks,
+                hit_by_pitch,
+                sacrifice_bunts,
+                sacrifice_flies,
+                strikeouts,
+                runs_batted_in,
+                runs
+            FROM player_season_events
+            WHERE is_batting
+        ),
+        calculated AS (
+            SELECT *,
+                hits + walks + hit_by_pitch AS times_on_base,
+                at_bats + walks + hit_by_pitch + sacrifice_flies AS plate_appearances_for_obp,
+                hits - doubles - triples - home_runs AS singles,
+                doubles + 2*triples + 3*home_runs AS total_bases
+            FROM event_stats
+        ),
+        rates AS (
+            -- OBP and SLG are each divided once and summed for OPS
+            SELECT *,
+                CAST(times_on_base AS DOUBLE) / NULLIF(plate_appearances_for_obp, 0) AS obp,
+                CAST(total_bases AS DOUBLE) / NULLIF(at_bats, 0) AS slg
+            FROM calculated
+        )
+        SELECT
+            c.season,
+            c.team_id,
+            c.player_id,
+            p.first_name,
+            p.last_name,
+            c.plate_appearances,
+            c.at_bats,
+            c.runs,
+            c.hits,
+            c.doubles,
+            c.triples,
+            c.home_runs,
+            c.runs_batted_in,
+            c.walks,
+            c.intentional_walks,
+            c.hit_by_pitch,
+            c.sacrifice_bunts,
+            c.sacrifice_flies,
+            c.strikeouts,
+            c.singles,
+            c.total_bases,
+            ROUND(CAST(c.hits AS DOUBLE) / NULLIF(c.at_bats, 0), 3) AS batting_average,
+            ROUND(c.obp, 3) AS on_base_percentage,
+            ROUND(c.slg, 3) AS slugging_percentage,
+            ROUND(c.obp + c.slg, 3) AS ops
+        FROM rates c
+        LEFT JOIN dim.players p ON c.player_id = p.player_id
+        ORDER BY c.season, c.player_id
+    """).fetchone()[0]
+
+    # Batting-title qualifiers (502 plate appearances, the MLB threshold) in
+    # season and OPS order, so season leaderboards read the top of a season's
+    # rows instead of sorting the whole offense table
+    cur.execute("DROP TABLE IF EXISTS metrics_offense_qualified")
+
+    qualified = cur.execute("""
+        CREATE TABLE metrics_offense_qualified AS
+        SELECT *
+        FROM metrics_player_season_league_offense
+        WHERE plate_appearances >= 502
+        ORDER BY season, ops DESC
+    """).fetchone()[0]
+
+    cur.execute("DROP TABLE IF EXISTS metrics_player_season_league_pitching")
+
+    pitching = cur.execute("""
+        CREATE TABLE metrics_player_season_league_pitching AS
+        WITH event_stats AS (
+            SELECT
+                season,
+                team_id,
+                player_id,
+                events AS batters_faced,
+                at_bats_against,
+                hits,
+                walks + intentional_walks AS walks,
+                intentional_walks,
+                hit_by_pitch,
+                strikeouts,
+                home_runs,
+                runs,
+                unearned_runs
+            FROM player_season_events
+            WHERE NOT is_batting
+        ),
+        calculated AS (
+            SELECT *,
+                at_bats_against - hits - walks - hit_by_pitch AS outs_recorded,
+                hits + walks - hit_by_pitch AS base_on_balls,
+                at_bats_against AS batters_faced_for_whip
+            FROM event_stats
+        ),
+        final AS (
+            -- The per-9 and per-batter rates multiply by one reciprocal each
+            SELECT *,
+                9.0 / NULLIF(outs_recorded, 0) AS inv_outs_x9,
+                1.0 / NULLIF(batters_faced, 0) AS inv_bf
+            FROM calculated
+        )
+        SELECT
+            c.season,
+            c.team_id,
+            c.player_id,
+            p.first_name,
+            p.last_name,
+            c.batters_faced,
+            c.at_bats_against,
+            c.outs_recorded,
+            ROUND(c.outs_recorded / 3.0, 1) AS innings_pitched,
+            c.hits,
+            c.walks,
+            c.intentional_walks,
+            c.hit_by_pitch,
+            c.strikeouts,
+            c.home_runs,
+            c.runs,
+            c.unearned_runs,
+            c.runs - c.unearned_runs AS earned_runs,
+            ROUND(CAST(c.base_on_balls AS DOUBLE) / NULLIF(c.batters_faced_for_whip, 0), 3) AS whip,
+            ROUND((c.runs - c.unearned_runs) * c.inv_outs_x9, 2) AS era,
+            ROUND(c.strikeouts * c.inv_outs_x9, 1) AS k_per_9,
+            ROUND(c.walks * c.inv_outs_x9, 1) AS bb_per_9,
+            ROUND(c.home_runs * c.inv_outs_x9, 1) AS hr_per_9,
+            ROUND(c.strikeouts * c.inv_bf, 3) AS k_rate,
+            ROUND(c.walks * c.inv_bf, 3) AS bb_rate
+        FROM final c
+        LEFT JOIN dim.players p ON c.player_id = p.player_id
+        ORDER BY c.season, c.player_id
+    """).fetchone()[0]
+
+    cur.execute("DROP TABLE player_season_events")
+
+    return {
+        "metrics_player_season_league_offense": offense,
+        "metrics_offense_qualified": qualified,
+        "metrics_player_season_league_pitching": pitching,
+    }
+
+
+# ============================================================
+# 3. Park Factors
+# ============================================================
+
+def build_park_factors(cur):
+    """Build park_factors from per-park hit, home run and run rates."""
+    create_pa_flags(cur)
+
+    cur.execute("DROP TABLE IF EXISTS park_factors")
+
+    count = cur.execute("""
+        CREATE TABLE park_factors AS
+        SELECT
+            season,
+            park_id,
+            park_name,
+            park_city,
+            games,
+            ROUND(h_per_out / NULLIF(league_h_per_out, 0), 3) AS park_factor_hits,
+            ROUND(hr_per_out / NULLIF(league_hr_per_out, 0), 3) AS park_factor_home_runs,
+            ROUND(r_per_out / NULLIF(league_r_per_out, 0), 3) AS park_factor_runs,
+            ROUND((h_per_out / NULLIF(league_h_per_out, 0) + hr_per_out / NULLIF(league_hr_per_out, 0) + r_per_out / NULLIF(league_r_per_out, 0)) / 3, 3) AS park_factor_overall
+        FROM (
+            -- Per-park rates, with the season's league rates taken from window
+            -- sums over the same per-park aggregates rather than a self-join
+            SELECT
+                hg.season,
+                hg.park_id,
+                p.name AS park_name,
+                p.city AS park_city,
+                COUNT(*) AS games,
+                CAST(SUM(hg.hits) AS DOUBLE) / NULLIF(SUM(hg.outs), 0) AS h_per_out,
+                CAST(SUM(hg.home_runs) AS DOUBLE) / NULLIF(SUM(hg.outs), 0) AS hr_per_out,
+                CAST(SUM(hg.runs) AS DOUBLE) / NULLIF(SUM(hg.outs), 0) AS r_per_out,
+                CAST(SUM(SUM(hg.hits)) OVER league AS DOUBLE) / NULLIF(SUM(SUM(hg.outs)) OVER league, 0) AS league_h_per_out,
+                CAST(SUM(SUM(hg.home_runs)) OVER league AS DOUBLE) / NULLIF(SUM(SUM(hg.outs)) OVER league, 0) AS league_hr_per_out,
+                CAST(SUM(SUM(hg.runs)) OVER league AS DOUBLE) / NULLIF(SUM(SUM(hg.outs)) OVER league, 0) AS league_r_per_out
+            FROM (
+                SELECT
+                    e.season,
+                    g.park_id,
+                    g.home_team_id,
+                    SUM(f.is_at_bat) AS outs,
+                    SUM(f.is_hit) AS hits,
+                    SUM(f.is_home_run) AS home_runs,
+                    SUM(e.runs_on_play) AS runs
+                FROM (
+                    -- Only batter events, and only the columns used here, reach the joins
+                    SELECT game_id, season, plate_appearance_result, runs_on_play
+                    FROM event.events
+                    WHERE batter_id IS NOT NULL
+                ) e
+                JOIN pa_flags f ON e.plate_appearance_result IS NOT DISTINCT FROM f.plate_appearance_result
+                JOIN game.games g USING (game_id)
+                GROUP BY e.season, g.park_id, g.home_team_id
+            ) hg
+            LEFT JOIN dim.parks p ON hg.park_id = p.park_id
+            GROUP BY hg.season, hg.park_id, p.name, p.city
+            WINDOW league AS (PARTITION BY hg.season)
+        ) pf
+        ORDER BY season, park_id
+    """).fetchone()[0]
+
+    return {"park_factors": count}
 
-count = con.execute("SELECT COUNT(*) FROM event_batted_ball_stats").fetchone()[0]
-print(f"   Created: {count:,} batted ball stat records")
+
+# ============================================================
+# 6. Event Batted Ball Stats
+# ============================================================
+
+def build_batted_ball_stats(cur):
+    """Build event_batted_ball_stats from the calc_batted_ball_type view."""
+    cur.execute("DROP TABLE IF EXISTS event_batted_ball_stats")
+
+    # Aggregates the classifications from the calc_batted_ball_type view rather
+    # than repeating its CASE expression
+    count = cur.execute(f"""
+        CREATE TABLE event_batted_ball_stats AS
+        SELECT
+            season,
+            batter_id,
+            pitcher_id,
+            batted_ball_type,
+            batted_trajectory,
+            COUNT(*) AS balls_in_play,
+            COUNT(*) FILTER (WHERE plate_appearance_result IN ({pa_results('Single', 'Double', 'Triple', 'HomeRun')})) AS hits,
+            COUNT(*) FILTER (WHERE outs_on_play > 0) AS outs,
+            ROUND(CAST(COUNT(*) FILTER (WHERE plate_appearance_result IN ({pa_results('Single', 'Double', 'Triple', 'HomeRun')})) AS DOUBLE) / NULLIF(COUNT(*), 0), 3) AS batting_average
+        FROM calc_batted_ball_type
+        WHERE batted_ball_type IS NOT NULL
+        GROUP BY season, batter_id, pitcher_id, batted_ball_type, batted_trajectory
+        ORDER BY season, batter_id
+    """).fetchone()[0]
+
+    return {"event_batted_ball_stats": count}
+
+
+# The three materialized builds are independent of each other (they read only
+# the source tables and the views above), so each runs on its own cursor of
+# the shared database and DuckDB schedules their pipelines side by side. Each
+# table is written in season order, so its row-group zonemaps cover a narrow
+# range of seasons and WHERE season = ... skips the rest.
+print("\nBuilding metrics tables, park_factors and event_batted_ball_stats...")
+builders = (build_player_metrics, build_park_factors, build_batted_ball_stats)
+# Row counts as returned by each CREATE TABLE AS, reused for the summary below
+counts = {}
+with ThreadPoolExecutor(max_workers=len(builders)) as pool:
+    futures = [pool.submit(builder, con.cursor()) for builder in builders]
+    for future in futures:
+        for table, count in future.result().items():
+            print(f"   Created {table}: {count:,} records")
+            counts[table] = count
 
 con.close()
 
@@ -351,12 +497,10 @@ print("\n" + "="*70)
 print("Advanced Analytics Tables Created Successfully!")
 print("="*70)
 
-# Show summary
-con = duckdb.connect(str(DB_PATH), read_only=True)
-
 print("\nTable Summary:")
 tables = [
     ("metrics_player_season_league_offense", "Player-season batting stats"),
+    ("metrics_offense_qualified", "Qualified hitters (502+ PA) by season and OPS"),
     ("metrics_player_season_league_pitching", "Player-season pitching stats"),
     ("park_factors", "Park factors by season"),
     ("event_baserunning_stats", "Baserunning event data"),
@@ -365,13 +509,10 @@ tables = [
 ]
 
 for table, description in tables:
-    try:
-        count = con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
-        print(f"  {table}: {count:,} records - {description}")
-    except Exception as e:
-        print(f"  {table}: Error - {e}")
-
-con.close()
+    if table in counts:
+        print(f"  {table}: {counts[table]:,} records - {description}")
+    else:
+        print(f"  {table}: view - {description}")
 
 print("\nExample queries:")
 print("  -- Get top hitters by OPS in 2023")
@@ -1,15 +1,20 @@
 #!/usr/bin/env python3
 """
 Process Retrosheet data year by year, importing to DuckDB.
-Can be interrupted safely - incomplete years are removed.
+Can be interrupted safely - incomplete years are rolled back.
 """
 
+import io
 import os
 import sys
 import signal
 import subprocess
 import tempfile
 import shutil
+import urllib.error
+import urllib.request
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import duckdb
 
@@ -19,6 +24,7 @@ RETROSHEET_DIR = BASE_DIR / "retrosheet"
 PARSER_DIR = BASE_DIR / "baseball.computer.rs"
 DB_PATH = BASE_DIR / "baseball.duckdb"
 RETROSHEET_URL = "https://www.retrosheet.org/events"
+MEMORY_LIMIT = "4GB"
 
 # Global flag for graceful shutdown
 shutdown_requested = False
@@ -35,19 +41,74 @@ def check_interrupted():
     """Check if shutdown was requested"""
     return shutdown_requested
 
+def open_db():
+    """Connect to the database with this script's resource settings"""
+    # Threads stay at DuckDB's default (one per core) and spills go to the
+    # default <db>.tmp directory beside the database file
+    con = duckdb.connect(str(DB_PATH))
+    con.execute("SET preserve_insertion_order = false")
+    con.execute(f"SET memory_limit = '{MEMORY_LIMIT}'")
+    return con
+
+# (schema, table) -> column names of the event and game tables, read from
+# the catalog once per run and extended as imports create new tables
+table_columns = None
+
+def load_table_columns(con):
+    """Return the table_columns cache, loading it from con on first use"""
+    global table_columns
+    if table_columns is None:
+        table_columns = {}
+        for schema, table_name, column_name in con.execute("""
+            SELECT table_schema, table_name, column_name
+            FROM information_schema.columns
+            WHERE table_schema IN ('event', 'game')
+            ORDER BY table_schema, table_name, ordinal_position
+        """).fetchall():
+            table_columns.setdefault((schema, table_name), []).append(column_name)
+    return table_columns
+
+def ensure_years_loaded(con):
+    """Create meta.years_loaded on databases set up before it existed"""
+    if con.execute("""
+        SELECT COUNT(*) FROM duckdb_tables()
+        WHERE schema_name = 'meta' AND table_name = 'years_loaded'
+    """).fetchone()[0]:
+        return
+
+    # One scan of the events already loaded backfills it; from then on each
+    # import records its year. The table and its backfill commit together, so
+    # an interrupted backfill leaves no half-filled table for the next run.
+    con.execute("BEGIN TRANSACTION")
+    try:
+        con.execute("CREATE SCHEMA IF NOT EXISTS meta")
+        con.execute("""
+            CREATE TABLE meta.years_loaded (
+                year SMALLINT PRIMARY KEY,
+                event_count BIGINT
+            )
+        """)
+        con.execute("""
+            INSERT INTO meta.years_loaded
+            SELECT SUBSTRING(game_id, 4, 4)::SMALLINT, COUNT(*)
+            FROM event.events
+            GROUP BY ALL
+        """)
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+
 def get_years_to_process():
     """Get list of years to process (2022 and earlier)"""
     # Check what years already exist in database
-    con = duckdb.connect(str(DB_PATH))
+    con = open_db()
     try:
-        result = con.execute("""
-            SELECT DISTINCT SUBSTRING(game_id, 4, 4) as year
-            FROM event.events
-            ORDER BY year DESC
-        """).fetchall()
+        # Database errors raise here rather than reading as "no years loaded",
+        # which would import every year a second time
+        ensure_years_loaded(con)
+        result = con.execute("SELECT year FROM meta.years_loaded").fetchall()
         existing_years = {row[0] for row in result}
-    except:
-        existing_years = set()
     finally:
         con.close()
     
@@ -57,7 +118,7 @@ def get_years_to_process():
     
     years_to_process = []
     for year in range(start_year, end_year - 1, -1):
-        if str(year) not in existing_years:
+        if year not in existing_years:
             years_to_process.append(year)
         else:
             print(f"Year {year} already in database, skipping...")
@@ -65,51 +126,49 @@ def get_years_to_process():
     return years_to_process
 
 def download_year(year, temp_dir):
-    """Download Retrosheet data for a specific year"""
+    """Download Retrosheet data for a year into its own staging directory"""
     print(f"  Downloading {year} data...")
 
-    zip_file = temp_dir / f"{year}eve.zip"
-
-    # Download the zip file
-    result = subprocess.run(
-        ["curl", "-s", "-o", str(zip_file), f"{RETROSHEET_URL}/{year}eve.zip"],
-        capture_output=True,
-        text=True
-    )
-
-    # Check if file exists and has reasonable size
-    if not zip_file.exists() or zip_file.stat().st_size < 100:
-        raise Exception(f"Failed to download {year} data - file not found")
+    # Download the zip into memory
+    try:
+        with urllib.request.urlopen(f"{RETROSHEET_URL}/{year}eve.zip", timeout=60) as response:
+            data = response.read()
+    except urllib.error.HTTPError as e:
+        if e.code == 404:
+            raise Exception(f"No event file available for {year}")
+        raise Exception(f"Failed to download {year} data - HTTP {e.code}")
 
     # Check if it's actually a zip file (check for zip magic number)
-    with open(zip_file, 'rb') as f:
-        header = f.read(4)
-        if header != b'PK\x03\x04':  # ZIP file magic number
-            # Not a zip file - probably a 404 page
-            zip_file.unlink()
-            raise Exception(f"No event file available for {year}")
+    if data[:4] != b'PK\x03\x04':  # ZIP file magic number
+        # Not a zip file - probably an error page
+        raise Exception(f"No event file available for {year}")
 
-    # Extract files
+    # Extract files straight from memory, with no zip written to disk
     print(f"  Extracting {year} files...")
-    subprocess.run(
-        ["unzip", "-q", "-o", str(zip_file), "-d", str(temp_dir)],
-        check=True
-    )
-    
-    # Move files to retrosheet directory
-    for ev_file in temp_dir.glob(f"{year}*.EV?"):
-        shutil.move(str(ev_file), RETROSHEET_DIR / ev_file.name)
-    
-    for ros_file in temp_dir.glob(f"*{year}.ROS"):
-        shutil.move(str(ros_file), RETROSHEET_DIR / ros_file.name)
+    stage_dir = temp_dir / f"retrosheet_{year}"
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        # The staging directory is the parser input, so the output holds only
+        # this year; roster files are also extracted into the retrosheet
+        # directory for add_reference_data.py
+        archive.extractall(stage_dir)
+        for name in archive.namelist():
+            if name.endswith(f"{year}.ROS"):
+                archive.extract(name, RETROSHEET_DIR)
     
-    # Clean up zip
-    zip_file.unlink()
-    
-    return True
+    return stage_dir
 
-def parse_year(year):
-    """Parse Retrosheet data for a specific year using the Rust parser"""
+def year_roster_files(year):
+    """List a year's roster files in the retrosheet directory in one scan"""
+    suffix = f"{year}.ROS"
+    try:
+        with os.scandir(RETROSHEET_DIR) as entries:
+            return [entry.path for entry in entries if entry.name.endswith(suffix)]
+    except FileNotFoundError:
+        # Nothing has been extracted on a fresh checkout yet
+        return []
+
+def parse_year(year, input_dir):
+    """Parse a year's staged Retrosheet files using the Rust parser"""
     print(f"  Parsing {year} event files...")
     
     output_dir = PARSER_DIR / f"parser_output_{year}"
@@ -123,7 +182,7 @@ def parse_year(year):
     result = subprocess.run(
         [
             str(PARSER_DIR / "target" / "release" / "baseball-computer"),
-            "--input", str(RETROSHEET_DIR),
+            "--input", str(input_dir),
             "--output-dir", str(output_dir)
         ],
         capture_output=True,
@@ -139,11 +198,10 @@ def parse_year(year):
     if not events_file.exists():
         raise Exception(f"No events.csv found for {year}")
     
-    # Count events for this year
-    con = duckdb.connect(":memory:")
-    con.execute(f"CREATE TABLE events AS SELECT * FROM read_csv_auto('{events_file}', ignore_errors=True)")
-    count = con.execute("SELECT COUNT(*) FROM events").fetchone()[0]
-    con.close()
+    # Count events for this year (data lines after the header; the import
+    # reports the exact number of rows it loads)
+    with open(events_file, 'rb') as f:
+        count = sum(1 for _ in f) - 1
     
     print(f"  Parsed {count:,} events for {year}")
     
@@ -151,210 +209,165 @@ def parse_year(year):
 
 def import_year_to_db(year, parser_output_dir):
     """Import parsed data for a year into DuckDB"""
+    global table_columns
     print(f"  Importing {year} into database...")
 
-    con = duckdb.connect(str(DB_PATH))
+    con = open_db()
+
+    # No automatic checkpoints in the middle of a year's import
+    con.execute("SET checkpoint_threshold = '16GB'")
 
-    # Get current schema to map columns correctly
-    # Parser outputs batting_side, but DB has side
-    events_file = parser_output_dir / "events.csv"
-
-    # Load CSV data and transform batting_side to side
-    con.execute(f"""
-        CREATE TEMP TABLE tmp_events AS
-        SELECT *,
-            CASE WHEN batting_side = 'bottom' THEN 'bottom' ELSE 'top' END as side
-        FROM read_csv_auto('{events_file}', ignore_errors=True)
-        WHERE SUBSTRING(game_id, 4, 4) = '{year}'
-    """)
-
-    # Drop batting_side column and insert
-    con.execute("ALTER TABLE tmp_events DROP COLUMN batting_side")
-
-    # Get columns in temp table and target table
-    target_cols = [row[0] for row in con.execute("DESCRIBE SELECT * FROM event.events").fetchall()]
-    temp_cols = [row[0] for row in con.execute("DESCRIBE SELECT * FROM tmp_events").fetchall()]
-
-    # Build column list (intersection of both)
-    common_cols = [c for c in temp_cols if c in target_cols]
-
-    # Insert using common columns
-    cols_str = ", ".join(common_cols)
-    con.execute(f"""
-        INSERT INTO event.events ({cols_str})
-        SELECT {cols_str} FROM tmp_events
-    """)
-
-    con.execute("DROP TABLE tmp_events")
+    # The whole year is one transaction: a failure or crash part-way leaves
+    # no rows for the year behind
+    con.execute("BEGIN TRANSACTION")
+    try:
+        # Get current schema to map columns correctly
+        # Parser outputs batting_side, but DB has side
+        events_file = parser_output_dir / "events.csv"
+
+        # CSV rows with batting_side transformed to side and season derived from
+        # game_id, read by the INSERT below as a single streaming pass
+        events_csv = f"""
+            SELECT * EXCLUDE (batting_side),
+                COALESCE(TRY_CAST(batting_side AS SIDE_ENUM), 'top'::SIDE_ENUM) as side,
+                SUBSTRING(game_id, 4, 4)::SMALLINT as season
+            FROM read_csv_auto('{events_file}', ignore_errors=True)
+        """
+
+        # Get columns in the CSV (DESCRIBE only sniffs the file) and target table
+        target_cols = load_table_columns(con)[("event", "events")]
+        csv_cols = [row[0] for row in con.execute(f"DESCRIBE {events_csv}").fetchall()]
+
+        # Build column list (intersection of both)
+        common_cols = [c for c in csv_cols if c in target_cols]
+
+        # Insert using common columns. Each year is one INSERT, so season is
+        # already contiguous in storage; ordering by batter within the year keeps
+        # the batter_id min/max statistics of each row group narrow as well.
+        cols_str = ", ".join(common_cols)
+        count = con.execute(f"""
+            INSERT INTO event.events ({cols_str})
+            SELECT {cols_str} FROM ({events_csv})
+            ORDER BY batter_id, game_id
+        """).fetchone()[0]
     
-    # Import other tables similarly
-    tables_to_import = [
-        ("event_audit", "event"),
-        ("event_baserunners", "event"),
-        ("event_comments", "event"),
-        ("event_fielding_play", "event"),
-        ("event_flags", "event"),
-        ("event_pitch_sequences", "event"),
-        ("game_lineup_appearances", "game"),
-        ("game_fielding_appearances", "game"),
-        ("game_earned_runs", "game"),
-        ("games", "game"),
-    ]
+        # Import other tables similarly
+        tables_to_import = [
+            ("event_audit", "event"),
+            ("event_baserunners", "event"),
+            ("event_comments", "event"),
+            ("event_fielding_play", "event"),
+            ("event_flags", "event"),
+            ("event_pitch_sequences", "event"),
+            ("game_lineup_appearances", "game"),
+            ("game_fielding_appearances", "game"),
+            ("game_earned_runs", "game"),
+            ("games", "game"),
+        ]
     
-    for table_name, schema in tables_to_import:
-        table_file = parser_output_dir / f"{table_name}.csv"
-        if table_file.exists():
-            if table_name == "game_lineup_appearances":
-                con.execute(f"""
-                    INSERT INTO {schema}.{table_name}
-                    SELECT
-                        game_id, player_id,
-                        CASE WHEN side = 'bottom' THEN 'bottom' ELSE 'top' END as side,
-                        CAST(lineup_position AS UTINYINT) as lineup_position,
-                        entered_game_as,
-                        CAST(start_event_id AS UTINYINT) as start_event_id,
-                        CAST(end_event_id AS UTINYINT) as end_event_id
-                    FROM read_csv_auto('{table_file}', ignore_errors=True)
-                    WHERE SUBSTRING(game_id, 4, 4) = '{year}'
-                """)
-            elif table_name == "game_fielding_appearances":
-                con.execute(f"""
-                    INSERT INTO {schema}.{table_name}
-                    SELECT
-                        game_id, player_id,
-                        CASE WHEN side = 'bottom' THEN 'bottom' ELSE 'top' END as side,
-                        CAST(fielding_position AS UTINYINT) as fielding_position,
-                        CAST(start_event_id AS UTINYINT) as start_event_id,
-                        CAST(end_event_id AS UTINYINT) as end_event_id
-                    FROM read_csv_auto('{table_file}', ignore_errors=True)
-                    WHERE SUBSTRING(game_id, 4, 4) = '{year}'
-                """)
-            elif table_name == "game_earned_runs":
-                con.execute(f"""
-                    INSERT INTO {schema}.{table_name}
-                    SELECT game_id, player_id, CAST(earned_runs AS UTINYINT)
-                    FROM read_csv_auto('{table_file}', ignore_errors=True)
-                    WHERE SUBSTRING(game_id, 4, 4) = '{year}'
-                    GROUP BY game_id, player_id, earned_runs
-                """)
-            else:
-                # Load to temp table first to avoid column resolution issues
-                temp_table = f"tmp_import_{table_name}"
-                con.execute(f"DROP TABLE IF EXISTS {temp_table}")
-                con.execute(f"CREATE TABLE {temp_table} AS SELECT * FROM read_csv_auto('{table_file}', ignore_errors=True)")
-
-                # Check if target table exists
-                target_exists = con.execute(f"""
-                    SELECT COUNT(*) FROM information_schema.tables
-                    WHERE table_schema = '{schema}' AND table_name = '{table_name}'
-                """).fetchone()[0] > 0
-
-                # Check if temp table has game_id column
-                has_game_id = con.execute(f"""
-                    SELECT COUNT(*) FROM information_schema.columns
-                    WHERE table_name = '{temp_table}' AND column_name = 'game_id'
-                """).fetchone()[0] > 0
-
-                if not target_exists:
-                    # Create the table from temp table data
-                    if has_game_id:
-                        con.execute(f"""
-                            CREATE TABLE {schema}.{table_name} AS
-                            SELECT * FROM {temp_table}
-                            WHERE SUBSTRING(game_id, 4, 4) = '{year}'
-                        """)
-                    else:
-                        con.execute(f"CREATE TABLE {schema}.{table_name} AS SELECT * FROM {temp_table}")
+        for table_name, schema in tables_to_import:
+            table_file = parser_output_dir / f"{table_name}.csv"
+            if table_file.exists():
+                if table_name == "game_lineup_appearances":
+                    con.execute(f"""
+                        INSERT INTO {schema}.{table_name}
+                        SELECT
+                            game_id, player_id,
+                            COALESCE(TRY_CAST(side AS SIDE_ENUM), 'top'::SIDE_ENUM) as side,
+                            CAST(lineup_position AS UTINYINT) as lineup_position,
+                            entered_game_as,
+                            CAST(start_event_id AS UTINYINT) as start_event_id,
+                            CAST(end_event_id AS UTINYINT) as end_event_id
+                        FROM read_csv_auto('{table_file}', ignore_errors=True)
+                    """)
+                elif table_name == "game_fielding_appearances":
+                    con.execute(f"""
+                        INSERT INTO {schema}.{table_name}
+                        SELECT
+                            game_id, player_id,
+                            COALESCE(TRY_CAST(side AS SIDE_ENUM), 'top'::SIDE_ENUM) as side,
+                            CAST(fielding_position AS UTINYINT) as fielding_position,
+                            CAST(start_event_id AS UTINYINT) as start_event_id,
+                            CAST(end_event_id AS UTINYINT) as end_event_id
+                        FROM read_csv_auto('{table_file}', ignore_errors=True)
+                    """)
+                elif table_name == "game_earned_runs":
+                    # Repeated rows in the parser output are dropped with
+                    # DISTINCT, which needs no aggregate state
+                    con.execute(f"""
+                        INSERT INTO {schema}.{table_name}
+                        SELECT DISTINCT game_id, player_id, CAST(earned_runs AS UTINYINT)
+                        FROM read_csv_auto('{table_file}', ignore_errors=True)
+                    """)
                 else:
-                    # Table exists, insert into it
-                    if has_game_id:
-                        con.execute(f"""
-                            INSERT INTO {schema}.{table_name}
-                            SELECT * FROM {temp_table}
-                            WHERE SUBSTRING(game_id, 4, 4) = '{year}'
-                        """)
-                    else:
-                        # Tables without game_id - import all (they link via event_id)
-                        con.execute(f"INSERT INTO {schema}.{table_name} SELECT * FROM {temp_table}")
-
-                con.execute(f"DROP TABLE {temp_table}")
-    
-    # Verify import
-    count = con.execute(f"""
-        SELECT COUNT(*) FROM event.events 
-        WHERE SUBSTRING(game_id, 4, 4) = '{year}'
-    """).fetchone()[0]
-    
-    con.close()
+                    # The parser output holds only this year, so once the target
+                    # exists the CSV is copied straight into it. Values that don't
+                    # fit the column types set by the first year imported raise
+                    # and roll the year back rather than dropping rows.
+                    if (schema, table_name) in load_table_columns(con):
+                        con.execute(f"COPY {schema}.{table_name} FROM '{table_file}' (FORMAT CSV, HEADER TRUE)")
+                        continue
+
+                    # First import: create the table straight from the CSV,
+                    # with the column types read_csv_auto detects
+                    con.execute(f"CREATE TABLE {schema}.{table_name} AS SELECT * FROM read_csv_auto('{table_file}', ignore_errors=True)")
+
+                    load_table_columns(con)[(schema, table_name)] = [
+                        row[0] for row in con.execute(f"DESCRIBE {schema}.{table_name}").fetchall()
+                    ]
     
+        # Recorded in the same transaction, so a listed year is always complete
+        con.execute("INSERT INTO meta.years_loaded VALUES (?, ?)", [year, count])
+
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        # Tables created by this import were rolled back as well
+        table_columns = None
+        raise
+    finally:
+        con.close()
+
     print(f"  Imported {count:,} events for {year}")
     return count
 
-def cleanup_year_files(year):
-    """Remove downloaded files for a year (after successful import)"""
-    print(f"  Cleaning up {year} source files...")
-
-    # Remove only event files - keep ROS files for player reference data
-    for ev_file in RETROSHEET_DIR.glob(f"{year}*.EV?"):
-        ev_file.unlink()
-
-def remove_year_from_db(year):
-    """Remove a year's data from the database (for cleanup on failure)"""
-    print(f"  Removing {year} data from database...")
+def prepare_year(year):
+    """Download and parse a year into a fresh temp directory.
 
+    Runs on a background thread one year ahead of the import in main(), so the
+    network and parser work for the next year overlaps the DuckDB import of
+    the current one. Returns (temp_dir, parser_output_dir, event_count).
+    """
+    temp_dir = Path(tempfile.mkdtemp())
     try:
-        # Try to connect with a timeout for the lock
-        con = duckdb.connect(str(DB_PATH), read_only=False)
-
-        # Delete from all tables
-        for schema in ["event", "game"]:
-            tables = con.execute(f"""
-                SELECT table_name FROM information_schema.tables
-                WHERE table_schema = '{schema}'
-            """).fetchall()
-
-            for (table_name,) in tables:
-                try:
-                    # First check if table has game_id column
-                    has_game_id = con.execute(f"""
-                        SELECT COUNT(*) FROM information_schema.columns
-                        WHERE table_schema = '{schema}' AND table_name = '{table_name}' AND column_name = 'game_id'
-                    """).fetchone()[0] > 0
-
-                    if has_game_id:
-                        con.execute(f"""
-                            DELETE FROM {schema}.{table_name}
-                            WHERE SUBSTRING(game_id, 4, 4) = '{year}'
-                        """)
-                except Exception as e:
-                    # Table might not have game_id or other error - log and continue
-                    pass
-
-        con.close()
-    except Exception as e:
-        print(f"  Warning: Could not remove {year} data: {e}")
-        # Don't raise - we want to continue cleanup even if this fails
+        stage_dir = download_year(year, temp_dir)
+        parser_output_dir, event_count = parse_year(year, stage_dir)
+    except Exception:
+        shutil.rmtree(temp_dir)
+        raise
+    return temp_dir, parser_output_dir, event_count
+
+def discard_prepared(prepared):
+    """Wait for a prepare_year future that will not be imported and remove its files"""
+    try:
+        temp_dir, parser_output_dir, _ = prepared.result()
+    except Exception:
+        return
+    shutil.rmtree(parser_output_dir, ignore_errors=True)
+    shutil.rmtree(temp_dir, ignore_errors=True)
 
-def process_year(year):
-    """Process a single year: download, parse, import"""
+def process_year(year, prepared):
+    """Process a single year: wait for its download and parse, then import"""
     print(f"\n{'='*60}")
     print(f"Processing Year: {year}")
     print(f"{'='*60}")
     
-    temp_dir = Path(tempfile.mkdtemp())
+    temp_dir = None
     parser_output_dir = None
     
     try:
-        # Download
-        if check_interrupted():
-            return False
-        download_year(year, temp_dir)
-        
-        # Parse
-        if check_interrupted():
-            remove_year_from_db(year)
-            return False
-        parser_output_dir, event_count = parse_year(year)
+        # Download and parse (started in the background by main)
+        temp_dir, parser_output_dir, event_count = prepared.result()
         
         if event_count == 0:
             print(f"  Warning: No events found for {year}")
@@ -362,17 +375,9 @@ def process_year(year):
         
         # Import
         if check_interrupted():
-            remove_year_from_db(year)
-            if parser_output_dir:
-                shutil.rmtree(parser_output_dir)
             return False
         import_year_to_db(year, parser_output_dir)
         
-        # Cleanup
-        cleanup_year_files(year)
-        if parser_output_dir:
-            shutil.rmtree(parser_output_dir)
-        
         print(f"  Year {year} completed successfully!")
         return True
         
@@ -384,20 +389,17 @@ def process_year(year):
             return True  # Skip successfully (not a failure)
 
         print(f"  ERROR processing {year}: {e}")
-        # Cleanup incomplete data
-        remove_year_from_db(year)
-        if parser_output_dir and parser_output_dir.exists():
-            shutil.rmtree(parser_output_dir)
-        # Also cleanup files
-        for ev_file in RETROSHEET_DIR.glob(f"{year}*.EV?"):
-            ev_file.unlink()
-        for ros_file in RETROSHEET_DIR.glob(f"*{year}.ROS"):
-            ros_file.unlink()
+        # The import rolled back, so only the roster files kept for this
+        # year need cleaning up
+        for ros_file in year_roster_files(year):
+            os.unlink(ros_file)
         return False
     
     finally:
-        # Clean up temp directory
-        if temp_dir.exists():
+        # Clean up parser output and temp directory (with the staged event files)
+        if parser_output_dir and parser_output_dir.exists():
+            shutil.rmtree(parser_output_dir)
+        if temp_dir and temp_dir.exists():
             shutil.rmtree(temp_dir)
 
 def main():
@@ -427,14 +429,31 @@ def main():
     successful = []
     failed = []
     
-    for year in years:
-        if process_year(year):
-            successful.append(year)
-        else:
-            failed.append(year)
-            if check_interrupted():
+    # Two-stage pipeline: one background thread downloads and parses the
+    # next year while the main thread imports the current one. DuckDB writes
+    # stay on the main thread.
+    with ThreadPoolExecutor(max_workers=1) as prepare_pool:
+        pending = prepare_pool.submit(prepare_year, years[0])
+        for i, year in enumerate(years):
+            prepared = pending
+            if prepared is None:
+                # Interrupted before this year was started
                 print("\nStopped by user request")
                 break
+            pending = None
+            if i + 1 < len(years) and not check_interrupted():
+                pending = prepare_pool.submit(prepare_year, years[i + 1])
+
+            if process_year(year, prepared):
+                successful.append(year)
+            else:
+                failed.append(year)
+                if check_interrupted():
+                    print("\nStopped by user request")
+                    break
+
+        if pending:
+            discard_prepared(pending)
     
     # Summary
     print("\n" + "="*60)
@@ -448,13 +467,10 @@ def main():
         print(f"  {', '.join(map(str, failed))}")
     
     # Show current database state
-    con = duckdb.connect(str(DB_PATH))
+    con = open_db()
     result = con.execute("""
-        SELECT 
-            SUBSTRING(game_id, 4, 4) as year,
-            COUNT(*) as event_count
-        FROM event.events
-        GROUP BY year
+        SELECT year, event_count
+        FROM meta.years_loaded
         ORDER BY year
     """).fetchall()
     con.close()
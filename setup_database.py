@@ -27,6 +27,7 @@ con.execute("CREATE SCHEMA game")
 con.execute("CREATE SCHEMA info")
 con.execute("CREATE SCHEMA box_score")
 con.execute("CREATE SCHEMA dim")
+con.execute("CREATE SCHEMA meta")
 
 # Create custom types
 print("  Creating custom types...")
@@ -35,6 +36,14 @@ con.execute("CREATE TYPE HAND_ENUM AS ENUM ('L', 'R', 'B')")
 con.execute("CREATE TYPE FRAME_ENUM AS ENUM ('first', 'second', 'third', 'home')")
 con.execute("CREATE TYPE BASE_ENUM AS ENUM ('first', 'second', 'third', 'home')")
 con.execute("CREATE TYPE BASERUNNER_ENUM AS ENUM ('first', 'second', 'third')")
+con.execute("""
+    CREATE TYPE PA_RESULT_ENUM AS ENUM (
+        'InPlayOut', 'StrikeOut', 'ReachedOnError', 'FieldersChoice',
+        'SacrificeFly', 'SacrificeHit', 'Walk', 'HitByPitch', 'IntentionalWalk',
+        'Interference', 'Single', 'Double', 'GroundRuleDouble', 'Triple',
+        'HomeRun', 'InsideTheParkHomeRun'
+    )
+""")
 
 # Create empty event table with proper schema
 print("  Creating event.events table...")
@@ -58,7 +67,7 @@ con.execute("""
         specified_pitcher_hand VARCHAR,
         strikeout_responsible_batter_id VARCHAR,
         walk_responsible_pitcher_id VARCHAR,
-        plate_appearance_result VARCHAR,
+        plate_appearance_result PA_RESULT_ENUM,
         batted_trajectory VARCHAR,
         batted_to_fielder BIGINT,
         batted_location_general VARCHAR,
@@ -70,7 +79,8 @@ con.execute("""
         runs_batted_in BIGINT,
         team_unearned_runs BIGINT,
         no_play_flag BOOLEAN,
-        side SIDE_ENUM
+        side SIDE_ENUM,
+        season SMALLINT  -- SUBSTRING(game_id, 4, 4), computed once at import
     )
 """)
 
@@ -165,7 +175,7 @@ print("  Skipping box_score tables (will be created during import)...")
 print("  Creating dim.teams...")
 con.execute("""
     CREATE TABLE dim.teams (
-        team_id VARCHAR PRIMARY KEY,
+        team_id VARCHAR,  -- Unique index built after load by add_reference_data.py
         city VARCHAR,
         name VARCHAR,
         nickname VARCHAR,
@@ -177,7 +187,7 @@ con.execute("""
 print("  Creating dim.parks...")
 con.execute("""
     CREATE TABLE dim.parks (
-        park_id VARCHAR PRIMARY KEY,
+        park_id VARCHAR,  -- Unique index built after load by add_reference_data.py
         name VARCHAR,
         city VARCHAR,
         state VARCHAR,
@@ -188,7 +198,7 @@ con.execute("""
 print("  Creating dim.players...")
 con.execute("""
     CREATE TABLE dim.players (
-        player_id VARCHAR PRIMARY KEY,
+        player_id VARCHAR,  -- Unique index built after load by add_reference_data.py
         last_name VARCHAR,
         first_name VARCHAR,
         bats VARCHAR,
@@ -197,6 +207,14 @@ con.execute("""
     )
 """)
 
+print("  Creating meta.years_loaded...")
+con.execute("""
+    CREATE TABLE meta.years_loaded (
+        year SMALLINT PRIMARY KEY,  -- Written in the same transaction as the year's data
+        event_count BIGINT
+    )
+""")
+
 con.close()
 
 print("\nDatabase created successfully!")
@@ -0,0 +1,25 @@
+import tempfile
+import unittest
+import urllib.error
+from concurrent.futures import Future
+from pathlib import Path
+from unittest import mock
+
+import process_historical
+
+
+class ProcessYearTest(unittest.TestCase):
+    def test_failed_download_without_retrosheet_dir(self):
+        """A year that fails before any roster file is extracted is logged, not raised"""
+        with tempfile.TemporaryDirectory() as tmp:
+            missing_dir = Path(tmp) / "retrosheet"
+            prepared = Future()
+            prepared.set_exception(urllib.error.URLError("connection refused"))
+
+            with mock.patch.object(process_historical, "RETROSHEET_DIR", missing_dir):
+                self.assertFalse(process_historical.process_year(2024, prepared))
+            self.assertFalse(missing_dir.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()